@@ -1,27 +1,89 @@
+import os
+
+# Sheets calls are blocking HTTPS round-trips; under gevent (USE_GEVENT=1, run with
+# `gunicorn -k gevent run:app`) they yield instead of pinning the worker. Patching
+# has to happen before anything else imports socket/ssl/threading.
+if os.environ.get('USE_GEVENT') == '1':
+    from gevent import monkey
+    monkey.patch_all()
+
 from flask import Flask
+from flask.logging import default_handler
+from flask_caching import Cache
+from flask_compress import Compress
 import logging
-from logging.handlers import RotatingFileHandler
-import os
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import atexit
+from app.log_handlers import BufferedTimedRotatingFileHandler, FastFormatter, disable_caller_lookup
+
+# In production nginx can serve /static/* straight from disk (STATIC_VIA_PROXY=1);
+# Flask then registers no static view at all
+STATIC_VIA_PROXY = os.environ.get('STATIC_VIA_PROXY') == '1'
 
 app = Flask(__name__, 
-           static_folder='static',  # Look directly in static directory
+           static_folder=None if STATIC_VIA_PROXY else 'static',  # Look directly in static directory
            static_url_path='/static')    # URL prefix for static files
 
+if STATIC_VIA_PROXY:
+    # Build-only rule: url_for('static', filename=...) still works, but Flask never matches it
+    app.add_url_rule('/static/<path:filename>', endpoint='static', build_only=True)
+
+# Behind nginx/Apache, let the front-end server stream file bodies itself
+# (Apache: mod_xsendfile with XSendFile On; nginx: see STATIC_ACCEL_REDIRECT_PREFIX
+# in static_assets.py)
+app.use_x_sendfile = os.environ.get('USE_X_SENDFILE') == '1'
+
+# In-process response cache for views (`from app import cache`). SimpleCache is
+# per-process; set CACHE_TYPE=RedisCache (plus CACHE_REDIS_URL) for multi-worker deploys
+cache = Cache(app, config={
+    'CACHE_TYPE': os.environ.get('CACHE_TYPE', 'SimpleCache'),
+    'CACHE_DEFAULT_TIMEOUT': 60,
+    'CACHE_REDIS_URL': os.environ.get('CACHE_REDIS_URL'),
+})
+
+# Compress API JSON (lots of repeated 'A'..'H' keys) per Accept-Encoding. Static
+# files are left alone: they already ship precompressed .br/.gz sidecars. Streamed
+# responses stay uncompressed so they still flush item by item.
+app.config.update(
+    COMPRESS_MIMETYPES=['application/json'],
+    COMPRESS_ALGORITHM=['br', 'gzip'],
+    COMPRESS_LEVEL=4,
+    COMPRESS_BR_LEVEL=4,
+    COMPRESS_STREAMS=False,
+)
+Compress(app)
+
 # Configure log rotation
 # Always log since this is a personal app running in dev environment
-# Create logs directory if it doesn't exist
-if not os.path.exists('logs'):
-    os.mkdir('logs')
-
-# Set up rotating file handler
-file_handler = RotatingFileHandler('logs/gpr.log', maxBytes=50*1024*1024, backupCount=2)
-file_handler.setFormatter(logging.Formatter(
-    '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-))
-file_handler.setLevel(logging.INFO)
-app.logger.addHandler(file_handler)
+# app.logger is the shared 'app' logger, so skip setup (and the filesystem
+# probe) when a previous import of this module already attached the handler
+if not any(isinstance(h, QueueHandler) for h in app.logger.handlers):
+    os.makedirs('logs', exist_ok=True)
+
+    # Rotate at midnight UTC and keep 7 gzipped days (64KB write buffer, flushed every 500ms)
+    file_handler = BufferedTimedRotatingFileHandler('logs/gpr.log', when='midnight', backupCount=7,
+                                                    buffer_size=int(os.getenv('LOG_BUFFER_SIZE', 64 * 1024)))
+    # LOG_CALLER_INFO=0 drops '[in path:line]' and the stack walk that produces it.
+    # That lookup is process-wide, so Flask's console format loses %(module)s too
+    # (it would otherwise print "(unknown file)" on every line)
+    log_caller_info = os.environ.get('LOG_CALLER_INFO', '1') == '1'
+    if not log_caller_info:
+        disable_caller_lookup()
+        default_handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s: %(message)s'))
+    file_handler.setFormatter(FastFormatter(include_caller=log_caller_info))
+    file_handler.setLevel(logging.INFO)
+
+    # Request threads only enqueue records; a background listener does the file I/O
+    # (including rotation) so slow disk writes never block a request
+    log_queue = queue.SimpleQueue()
+    log_listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+    app.logger.addHandler(QueueHandler(log_queue))
 
 app.logger.setLevel(logging.INFO)
 app.logger.info('Guitar Practice Routine App startup')
 
+from app import static_assets
 from app import routes
\ No newline at end of file
@@ -0,0 +1,67 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Optional
+
+# Content-addressed store for Claude responses. Keys are sha256 hex digests of
+# whatever determines the answer (file bytes, prompt, model), so a re-upload of
+# the same file is answered from disk instead of another API round-trip.
+LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH', os.path.join('data', 'llm_cache.db'))
+DEFAULT_TTL_DAYS = 30
+
+_local = threading.local()
+
+
+def _connect():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        directory = os.path.dirname(LLM_CACHE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(LLM_CACHE_PATH, timeout=5)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS llm_cache ('
+            'hash TEXT PRIMARY KEY, response TEXT NOT NULL, '
+            'created_at REAL NOT NULL, expires_at REAL NOT NULL)'
+        )
+        _local.conn = conn
+    return conn
+
+
+def get(key) -> Optional[str]:
+    """Return the cached response for key, or None if missing or expired"""
+    try:
+        row = _connect().execute(
+            'SELECT response FROM llm_cache WHERE hash = ? AND expires_at > ?',
+            (key, time.time()),
+        ).fetchone()
+    except sqlite3.Error:
+        return None  # A broken cache only costs an API call
+    return row[0] if row else None
+
+
+def set(key, response_text, ttl_days=DEFAULT_TTL_DAYS):
+    """Store response_text under key for ttl_days"""
+    now = time.time()
+    try:
+        conn = _connect()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO llm_cache (hash, response, created_at, expires_at) '
+                'VALUES (?, ?, ?, ?)',
+                (key, response_text, now, now + ttl_days * 86400),
+            )
+    except sqlite3.Error:
+        pass
+
+
+def delete(key):
+    """Drop key from the cache (e.g. when the cached value turned out to be stale)"""
+    try:
+        conn = _connect()
+        with conn:
+            conn.execute('DELETE FROM llm_cache WHERE hash = ?', (key,))
+    except sqlite3.Error:
+        pass
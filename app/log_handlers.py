@@ -0,0 +1,119 @@
+import os
+import gzip
+import time
+import shutil
+import logging
+import threading
+from logging.handlers import TimedRotatingFileHandler
+
+
+class FastFormatter(logging.Formatter):
+    """Formatter for '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
+
+    Builds the line with a single f-string instead of %-formatting a template, and
+    only calls strftime once per second since every record in that second shares
+    the same date/time prefix. With include_caller=False the ' [in path:line]'
+    suffix is dropped.
+    """
+
+    def __init__(self, include_caller=True):
+        super().__init__()
+        self.include_caller = include_caller
+        self._last_sec = None
+        self._last_asctime = ''
+
+    def format(self, record):
+        sec = int(record.created)
+        if sec != self._last_sec:
+            self._last_sec = sec
+            self._last_asctime = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(sec))
+        record.message = record.getMessage()
+        line = f"{self._last_asctime},{int(record.msecs):03d} {record.levelname}: {record.message}"
+        if self.include_caller:
+            line = f"{line} [in {record.pathname}:{record.lineno}]"
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line = f"{line}\n{record.exc_text}"
+        if record.stack_info:
+            line = f"{line}\n{self.formatStack(record.stack_info)}"
+        return line
+
+
+def disable_caller_lookup():
+    """Skip the per-record stack walk and thread/process lookups in logging
+
+    Only safe when no formatter uses pathname, lineno, funcName, thread or process.
+    """
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+
+def _gzip_and_remove(path, dest):
+    try:
+        with open(path, 'rb') as src, gzip.open(dest, 'wb', compresslevel=9) as out:
+            shutil.copyfileobj(src, out)
+        os.remove(path)
+    except OSError:
+        pass  # Leave the uncompressed file in place rather than lose it
+
+
+class BufferedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """TimedRotatingFileHandler that buffers writes and gzips old files off-thread
+
+    The stock handler flushes after every record. Here records accumulate in a
+    large write buffer and a daemon thread flushes every flush_interval seconds,
+    so bursts of logging turn into a handful of write() syscalls.
+
+    The file is opened in binary append mode and records are written as
+    pre-encoded UTF-8 bytes, skipping TextIOWrapper's encoder and newline
+    translation. At rollover the current file is only renamed; compressing it
+    to <name>.<date>.gz happens in a background thread.
+    """
+
+    def __init__(self, filename, when='midnight', interval=1, backupCount=7, encoding='utf-8',
+                 delay=True, utc=True, buffer_size=64 * 1024, flush_interval=0.5):
+        self.text_encoding = encoding or 'utf-8'
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        super().__init__(filename, when=when, interval=interval, backupCount=backupCount,
+                         encoding=encoding, delay=delay, utc=utc)
+        self.namer = lambda name: name + '.gz'
+        self.rotator = self._rotate_and_compress
+        self._stop_flusher = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically,
+                                         name='log-flusher', daemon=True)
+        self._flusher.start()
+
+    def _open(self):
+        return open(self.baseFilename, 'ab', buffering=self.buffer_size)
+
+    def _rotate_and_compress(self, source, dest):
+        # dest is '<base>.<date>.gz'; rename is O(1), gzip runs off the logging thread
+        plain = dest[:-3]
+        if not os.path.exists(source):
+            return
+        os.rename(source, plain)
+        threading.Thread(target=_gzip_and_remove, args=(plain, dest),
+                         name='log-compress', daemon=True).start()
+
+    def emit(self, record):
+        # Same as TimedRotatingFileHandler.emit minus the per-record flush
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write((self.format(record) + self.terminator).encode(self.text_encoding, 'backslashreplace'))
+        except Exception:
+            self.handleError(record)
+
+    def _flush_periodically(self):
+        while not self._stop_flusher.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stop_flusher.set()
+        super().close()
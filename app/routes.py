@@ -1,35 +1,236 @@
-from flask import render_template, request, jsonify, redirect, session, url_for
-from app import app # type: ignore
+from flask import render_template, request, jsonify, redirect, session, url_for, Response, g
+from app import app, cache # type: ignore
+from app import llm_cache # type: ignore
 from app.sheets import ( # type: ignore
     get_all_items, add_item, update_item, delete_item,
     add_to_routine, get_all_routines,
-    test_sheets_connection, get_credentials, update_items_order,
+    test_sheets_connection, get_cached_connection_status, clear_connection_status,
+    get_credentials, update_items_order,
     create_routine, update_routine_item,
     remove_from_routine, delete_routine, get_active_routine, set_routine_active,
-    get_spread, sheet_to_records,
+    get_cached_spread, clear_cached_spread, batch_writer, sheet_to_records,
+    get_worksheet, get_routine_records, remember_routine_records, invalidate_routine_records,
     records_to_sheet, get_chord_charts_for_item, add_chord_chart, batch_add_chord_charts,
     delete_chord_chart, update_chord_chart, update_chord_charts_order,
     get_common_chord_charts, search_common_chord_charts, seed_common_chord_charts, 
     bulk_import_chords_from_tormodkv, bulk_import_chords_from_local_file,
-    copy_chord_charts_to_items, get_common_chords_efficiently
+    copy_chord_charts_to_items, get_common_chords_efficiently, _to_id,
+    retry_on_rate_limit, get_chord_chart_records, parse_chord_data
 )
-from google_auth_oauthlib.flow import Flow
 import os
 import logging
 import time  # Add at the top with other imports
-import math
-from typing import List, Dict
+from typing import List, Dict, Optional
+from dataclasses import dataclass
+from functools import cached_property
+from contextlib import asynccontextmanager
 from datetime import datetime
 import subprocess
-from difflib import get_close_matches
+import hashlib
+import threading
+import asyncio
+import contextvars
+import queue
+import weakref
 import re
 import base64
+import io
 import json
+from collections import defaultdict
+from operator import itemgetter
+from itertools import chain
+from uuid import uuid4
 from werkzeug.utils import secure_filename
-import anthropic
+from rapidfuzz import process as fuzz_process, fuzz
+import orjson
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; clients then always get JSON
+    msgpack = None
+
+try:
+    from pdfminer.high_level import extract_text as pdf_extract_text
+except ImportError:  # pdfminer.six is optional; every upload then goes to Sonnet for detection
+    pdf_extract_text = None
 
 logging.basicConfig(level=logging.DEBUG)
 
+def ojson(data, status=200, etag=False):
+    """jsonify() replacement using orjson, for the large read endpoints.
+
+    With etag=True the response carries a content-hash ETag so polling clients
+    get a 304 (see conditional_api_get) when nothing changed.
+    """
+    body = orjson.dumps(data)
+    response = Response(body, status=status, mimetype='application/json')
+    if etag:
+        response.set_etag(hashlib.blake2b(body, digest_size=8).hexdigest())
+        # Always revalidate: a max-age would hide the user's own writes
+        response.cache_control.no_cache = True
+    return response
+
+def wants_msgpack():
+    """True when the client asked for MessagePack and msgpack is installed"""
+    return msgpack is not None and 'application/msgpack' in request.headers.get('Accept', '')
+
+def negotiate(data, status=200):
+    """ojson() unless the client sent Accept: application/msgpack"""
+    if wants_msgpack():
+        response = Response(msgpack.packb(data, use_bin_type=True), status=status,
+                            mimetype='application/msgpack')
+    else:
+        response = ojson(data, status)
+    response.vary.add('Accept')
+    return response
+
+# Polled GET endpoints are cached briefly so bursts of identical requests from the
+# SPA share one Sheets read; any successful API write clears the cache
+API_CACHE_TTL = 15  # seconds
+
+def cache_ok_only(response):
+    """response_filter for @cache.cached so a failed Sheets read isn't replayed to every poller"""
+    return getattr(response, 'status_code', None) == 200
+
+def bust_cache():
+    """Drop all cached API responses after items/routines change"""
+    cache.clear()
+
+@cache.memoize(timeout=API_CACHE_TTL)
+def get_items_by_id():
+    """Map integer item ID -> Items record, cached (and busted) with the API responses"""
+    items_by_id = {}
+    for record in get_all_items():
+        try:
+            items_by_id[_to_id(record['A'])] = record
+        except (KeyError, ValueError, TypeError):
+            continue  # Skip blank/malformed ID cells
+    return items_by_id
+
+# Routine entry ID -> sheet row for each routine sheet, so a completion toggle is a
+# single cell write. Rows only move when entries are added or removed, which
+# invalidate the routine's map explicitly.
+ROUTINE_ROW_MAP_TTL = 30  # seconds
+_routine_row_maps = {}  # routine_id -> (built_at, {entry_id: row})
+_routine_row_maps_lock = threading.Lock()
+
+def get_routine_row_map(spread, routine_id, refresh=False):
+    """Get {routine entry ID: sheet row} for a routine, reading column A on a miss"""
+    key = str(routine_id)
+    if not refresh:
+        with _routine_row_maps_lock:
+            cached = _routine_row_maps.get(key)
+        if cached and time.time() - cached[0] < ROUTINE_ROW_MAP_TTL:
+            return cached[1]
+    values = spread.values_get(f"{key}!A2:A").get('values', [])
+    row_map = {r[0]: idx + 2 for idx, r in enumerate(values) if r}  # +2: 1-based + header
+    with _routine_row_maps_lock:
+        _routine_row_maps[key] = (time.time(), row_map)
+    return row_map
+
+def invalidate_routine_row_map(routine_id):
+    with _routine_row_maps_lock:
+        _routine_row_maps.pop(str(routine_id), None)
+
+# Completion toggles are written behind: the request enqueues
+# ((routine_id, entry_id), completed) and returns 202, and a daemon thread
+# writes everything that arrived within TOGGLE_FLUSH_INTERVAL as one batch.
+# Repeated toggles of one entry collapse to the latest state. Rows are looked up
+# when the batch is written, so a reorder in between can't misdirect the write,
+# and a failed batch is kept and retried with backoff. The client already
+# updates its checkbox optimistically.
+TOGGLE_FLUSH_INTERVAL = 0.2  # seconds
+TOGGLE_RETRY_MAX_DELAY = 60  # seconds
+_toggle_queue = queue.Queue()
+_toggle_writer = None
+_toggle_writer_lock = threading.Lock()
+
+def queue_completion_toggle(routine_id, entry_id, completed):
+    """Queue a completion write, starting the writer thread on first use"""
+    global _toggle_writer
+    with _toggle_writer_lock:
+        if _toggle_writer is None:
+            _toggle_writer = threading.Thread(target=_write_toggles_forever, name='toggle-writer', daemon=True)
+            _toggle_writer.start()
+    _toggle_queue.put(((str(routine_id), str(entry_id)), bool(completed)))
+
+def _drain_toggles(pending, max_wait):
+    """Add queued toggles to pending (blocking for the first one if pending is
+    empty), taking whatever else arrives within max_wait"""
+    if not pending:
+        key, completed = _toggle_queue.get()
+        pending[key] = completed
+    deadline = time.monotonic() + max_wait
+    while (remaining := deadline - time.monotonic()) > 0:
+        try:
+            key, completed = _toggle_queue.get(timeout=remaining)
+        except queue.Empty:
+            break
+        pending[key] = completed
+    return pending
+
+def _write_toggles(pending):
+    spread = get_cached_spread()
+    with batch_writer(spread) as writer:
+        for (routine_id, entry_id), completed in pending.items():
+            row_idx = get_routine_row_map(spread, routine_id).get(entry_id)
+            if row_idx is None:
+                row_idx = get_routine_row_map(spread, routine_id, refresh=True).get(entry_id)
+            if row_idx is None:
+                logging.warning(f"Dropping completion toggle for entry {entry_id}: no longer in routine {routine_id}")
+                continue
+            cell = f"{routine_id}!D{row_idx}"
+            # 'TRUE' for completed, cleared cell for not completed
+            if completed:
+                writer.update(cell, [['TRUE']])
+            else:
+                writer.clear(cell)
+
+def _write_toggles_forever():
+    pending = {}
+    delay = TOGGLE_FLUSH_INTERVAL
+    while True:
+        pending = _drain_toggles(pending, delay)
+        try:
+            _write_toggles(pending)
+        except Exception as e:
+            # Keep the batch; newer toggles drained on the next pass override it
+            delay = min(max(delay * 2, 1), TOGGLE_RETRY_MAX_DELAY)
+            logging.error(f"Failed to write completion toggles {list(pending)}, retrying in {delay}s: {str(e)}")
+            continue
+        logging.debug(f"Wrote {len(pending)} completion toggle(s)")
+        pending = {}
+        delay = TOGGLE_FLUSH_INTERVAL
+        # The request already busted the cache, but a poll may have re-cached
+        # the old state before this write landed
+        with app.app_context():
+            bust_cache()
+
+@app.after_request
+def conditional_api_get(response):
+    """Answer If-None-Match with 304 for API responses that carry an ETag.
+
+    Runs after the view (or its cached copy) so cache hits get 304s too.
+    """
+    if (request.method == 'GET'
+            and request.path.startswith('/api/')
+            and response.status_code == 200
+            and response.get_etag()[0]):
+        return response.make_conditional(request)
+    return response
+
+# POST endpoints that don't modify sheet data
+READ_ONLY_POST_ENDPOINTS = {'batch_chord_charts', 'debug_log_route', 'open_folder'}
+
+@app.after_request
+def bust_cache_on_write(response):
+    if (request.method in ('POST', 'PUT', 'DELETE')
+            and request.path.startswith('/api/')
+            and request.endpoint not in READ_ONLY_POST_ENDPOINTS
+            and response.status_code < 400):
+        bust_cache()
+    return response
+
 # Main route
 @app.route('/')
 def index():
@@ -38,6 +239,7 @@ def index():
 
 # Item routes
 @app.route('/api/items', methods=['GET', 'POST'])
+@cache.cached(timeout=API_CACHE_TTL, query_string=True, unless=lambda: request.method != 'GET', response_filter=cache_ok_only)
 def items():
     """Handle GET (list) and POST (create) for items"""
     if request.method == 'GET':
@@ -58,10 +260,11 @@ def items():
         return jsonify(result)
 
 @app.route('/api/items/lightweight', methods=['GET'])
+@cache.cached(timeout=API_CACHE_TTL, query_string=True, response_filter=cache_ok_only)
 def items_lightweight():
     """Get items with minimal data - only ID and Title for the list view"""
     try:
-        spread = get_spread()
+        spread = get_cached_spread()
         
         # Get only columns A (ID) and C (Title) from Items sheet
         batch_data = spread.values_batch_get([
@@ -77,11 +280,11 @@ def items_lightweight():
             for r in items_data
         ]
         
-        return jsonify(items)
+        return ojson(items, etag=True)
         
     except Exception as e:
         app.logger.error(f"Error getting lightweight items: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
 
 @app.route('/api/items/order', methods=['PUT'])
 def order_items():
@@ -89,18 +292,11 @@ def order_items():
     items = request.json
     return jsonify(update_items_order(items))
 
-@app.route('/api/items/<item_id>', methods=['GET', 'PUT', 'DELETE'])
+@app.route('/api/items/<int:item_id>', methods=['GET', 'PUT', 'DELETE'])
 def item(item_id):
     """Handle GET (fetch), PUT (update) and DELETE for individual items"""
-    try:
-        item_id = int(float(item_id))
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid item ID"}), 400
-        
     if request.method == 'GET':
-        # Get all items and find the requested one
-        all_items = get_all_items()
-        item = next((item for item in all_items if int(float(item['A'])) == item_id), None)
+        item = get_items_by_id().get(item_id)
         if item:
             return jsonify(item)
         return jsonify({"error": "Item not found"}), 404
@@ -140,9 +336,6 @@ def routines():
             
             try:
                 result = create_routine(routine_name)
-                if result:
-                    # Add a small delay to ensure sheet is ready
-                    time.sleep(2)
                 app.logger.debug(f"Routine creation result: {result}")
                 return jsonify({"success": result}), 201
             except ValueError as ve:
@@ -162,12 +355,12 @@ def routine_operations(routine_id):
     try:
         if request.method == 'GET':
             # Get the worksheet using routine ID as sheet name
-            spread = get_spread()
-            worksheet = spread.worksheet(str(routine_id))
+            worksheet = get_worksheet(routine_id)
             routine_data = sheet_to_records(worksheet, is_routine_worksheet=True)
             return jsonify(routine_data)
         elif request.method == 'DELETE':
             result = delete_routine(str(routine_id))
+            invalidate_routine_row_map(routine_id)
             if result:
                 return '', 204
             return jsonify({"error": "Failed to delete routine"}), 500
@@ -175,57 +368,82 @@ def routine_operations(routine_id):
         app.logger.error(f"Error in routine_operations: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/routines/<int:routine_id>/details', methods=['GET'])
-def get_routine_with_details(routine_id):
-    """Get a routine with all item details and metadata."""
-    try:
-        spread = get_spread()
+# Column letters for rows returned by values_batch_get
+ITEM_COLS = ('A', 'B', 'C', 'D', 'E', 'F', 'G', 'H')  # ID, Item ID, Title, Notes, Duration, Description, Order, Tuning
+ITEM_COL_COUNT = len(ITEM_COLS)
+ROUTINE_ENTRY_COLS = ('A', 'B', 'C')  # ID, Item ID, Order; D (Completed) is normalized separately
+
+ROUTINES_MAP_TTL = 30  # seconds
+
+@cache.memoize(timeout=ROUTINES_MAP_TTL)
+def get_routines_map():
+    """Map routine ID -> Routines index row ({'A': id, 'B': name, 'C': created, 'D': order}).
+
+    Cached with the API responses, so any API write (e.g. creating a routine) busts it.
+    """
+    rows = get_cached_spread().values_get("Routines!A2:D").get('values', [])
+    return {
+        r[0]: dict(zip('ABCD', r + [''] * (4 - len(r))))
+        for r in rows if r
+    }
+
+def build_items_by_id(items_data):
+    """Index Items rows by Item ID (column B), padding short rows (trailing blanks) with ''."""
+    return {
+        r[1]: dict(zip(ITEM_COLS, r if len(r) == ITEM_COL_COUNT else r + [''] * (ITEM_COL_COUNT - len(r))))
+        for r in items_data
+    }
+
+def _load_routine_bundle(routine_id):
+    """Fetch and parse a routine's metadata, entries and the Items sheet in one batch get.
+
+    Returns (routine_meta or None, routine_items, items_by_id), with items_by_id
+    keyed by Item ID (column B), which is what routine entries reference. Memoized
+    per request in flask.g and across requests in the API cache (busted on writes).
+    """
+    key = f"routine_bundle:{routine_id}"
+    bundles = g.setdefault('routine_bundles', {})
+    if key in bundles:
+        return bundles[key]
+
+    bundle = cache.get(key)
+    if bundle is None:
+        spread = get_cached_spread()
         
-        # Batch get all required data
+        # Batch get all required data; routine metadata comes from the routines map
         batch_data = spread.values_batch_get([
-            f"Routines!A2:D",  # Get routine metadata
             f"{routine_id}!A2:D",  # Get routine items
             "Items!A2:H"  # Get items data
         ])
         
-        # Process routine metadata
-        routines_data = batch_data['valueRanges'][0].get('values', [])
-        routine_meta = next((
-            {'A': r[0], 'B': r[1], 'C': r[2], 'D': r[3]} 
-            for r in routines_data 
-            if r[0] == str(routine_id)
-        ), None)
-        
-        if not routine_meta:
-            return jsonify({"error": "Routine not found"}), 404
+        routine_meta = get_routines_map().get(str(routine_id))
 
         # Process routine items
-        routine_items_data = batch_data['valueRanges'][1].get('values', [])
+        routine_items_data = batch_data['valueRanges'][0].get('values', [])
+        # A=ID, B=Item ID, C=Order, D=Completed ('TRUE' or '')
         routine_items = [
-            {
-                'A': r[0],  # ID
-                'B': r[1],  # Item ID
-                'C': r[2],  # Order
-                'D': r[3] if len(r) > 3 and r[3] == 'TRUE' else ''  # Completed
-            }
+            dict(zip(ROUTINE_ENTRY_COLS, r), D='TRUE' if r[3:4] == ['TRUE'] else '')
             for r in routine_items_data
         ]
 
         # Process items data
-        items_data = batch_data['valueRanges'][2].get('values', [])
-        items_by_id = {
-            r[1]: {  # Index by Item ID (column B)
-                'A': r[0],  # ID
-                'B': r[1],  # Item ID
-                'C': r[2],  # Title
-                'D': r[3],  # Notes
-                'E': r[4],  # Duration
-                'F': r[5],  # Description
-                'G': r[6],  # Order
-                'H': r[7] if len(r) > 7 else ''  # Tuning
-            }
-            for r in items_data
-        }
+        items_data = batch_data['valueRanges'][1].get('values', [])
+        items_by_id = build_items_by_id(items_data)
+
+        bundle = (routine_meta, routine_items, items_by_id)
+        cache.set(key, bundle, timeout=API_CACHE_TTL)
+
+    bundles[key] = bundle
+    return bundle
+
+@app.route('/api/routines/<int:routine_id>/details', methods=['GET'])
+def get_routine_with_details(routine_id):
+    """Get a routine with all item details and metadata."""
+    try:
+        routine_meta, routine_items, items_by_id = _load_routine_bundle(routine_id)
+        
+        if not routine_meta:
+            return ojson({"error": "Routine not found"}, 404)
 
         # Combine routine items with their details
         items_with_details = []
@@ -237,7 +455,7 @@ def get_routine_with_details(routine_id):
                 "itemDetails": item_details
             })
 
-        return jsonify({
+        return negotiate({
             "id": routine_meta['A'],
             "name": routine_meta['B'],
             "created": routine_meta['C'],
@@ -247,7 +465,7 @@ def get_routine_with_details(routine_id):
 
     except Exception as e:
         app.logger.error(f"Error getting routine with details: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
 
 @app.route('/api/routines/<int:routine_id>/order', methods=['PUT'])
 def update_routine_order_route(routine_id):
@@ -258,12 +476,11 @@ def update_routine_order_route(routine_id):
         app.logger.debug(f"Items to reorder: {items}")
         
         # Get the worksheet using routine ID as sheet name
-        spread = get_spread()
-        worksheet = spread.worksheet(str(routine_id))
+        worksheet = get_worksheet(routine_id)
         app.logger.debug(f"Found worksheet for routine: {routine_id}")
         
         # Get existing items to preserve all data
-        existing_items = sheet_to_records(worksheet, is_routine_worksheet=True)
+        existing_items = get_routine_records(worksheet)
         app.logger.debug(f"Existing items: {existing_items}")
         
         # Create a map of routine entry IDs to their new order
@@ -287,12 +504,14 @@ def update_routine_order_route(routine_id):
         app.logger.error(f"Error updating routine order: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/routines/<int:routine_id>/items/<item_id>', methods=['PUT', 'DELETE'])
+@app.route('/api/routines/<int:routine_id>/items/<int:item_id>', methods=['PUT', 'DELETE'])
 def routine_item(routine_id, item_id):
     """Handle updates and deletions of routine items"""
     try:
         if request.method == 'DELETE':
-            success = remove_from_routine(routine_id, item_id)
+            # Routine entry IDs are compared as sheet strings
+            success = remove_from_routine(routine_id, str(item_id))
+            invalidate_routine_row_map(routine_id)
             if success:
                 return jsonify({"success": True})
             return jsonify({"error": "Failed to remove item"}), 500
@@ -320,6 +539,7 @@ def add_routine_item(routine_id):
             return jsonify({"error": "Item ID is required"}), 400
             
         result = add_to_routine(routine_id, item_id)
+        invalidate_routine_row_map(routine_id)
         if result:
             return jsonify(result), 201
         return jsonify({"error": "Failed to add item"}), 500
@@ -334,11 +554,22 @@ def logout_and_redirect():
         if os.path.exists('token.json'):
             os.remove('token.json')
         get_credentials.cache_clear()  # Clear the credentials cache
+        clear_cached_spread()
+        clear_connection_status()
         return redirect(url_for('index'))
     except Exception as e:
         logging.error(f"Error during logout: {str(e)}")
         return redirect(url_for('index'))  # Redirect even if there's an error
 
+@app.route('/api/cache/clear', methods=['POST'])
+def clear_cache():
+    """Drop all cached view responses (requires valid credentials)"""
+    creds, _ = get_credentials()
+    if not creds or not creds.valid:
+        return jsonify({"error": "Not authenticated"}), 401
+    cache.clear()
+    return jsonify({"success": True})
+
 @app.route('/api/auth/status')
 def auth_status():
     """Check if we have valid credentials and spreadsheet access"""
@@ -348,7 +579,7 @@ def auth_status():
             return jsonify({"authenticated": False})
 
         # Test spreadsheet access
-        test_result = test_sheets_connection()
+        test_result = get_cached_connection_status()
         return jsonify({
             "authenticated": True,
             "hasSpreadsheetAccess": test_result.get("success", False)
@@ -391,6 +622,8 @@ def oauth2callback():
         
         # Clear the credentials cache
         get_credentials.cache_clear()
+        clear_cached_spread()
+        clear_connection_status()
         
         # Verify credentials work by testing connection
         test_sheets_connection()
@@ -453,15 +686,9 @@ def test_sheets():
 @app.route('/api/items/<int:item_id>/notes', methods=['GET', 'POST'])
 def save_item_notes(item_id):
     if request.method == 'GET':
-        # Get the worksheet for the Items sheet
-        spread = get_spread()
-        worksheet = spread.worksheet('Items')
-        
-        # Find the row with this item_id
-        items = sheet_to_records(worksheet, is_routine_worksheet=False)
-        for item in items:
-            if item['A'] == str(item_id):  # Just convert route param to string once
-                return jsonify({'notes': item.get('D', '')})  # Column D is Notes
+        item = get_items_by_id().get(item_id)
+        if item is not None:
+            return jsonify({'notes': item.get('D', '')})  # Column D is Notes
         
         app.logger.debug(f"DEBUG:get_notes:Item {item_id} not found!")
         return jsonify({'error': 'Item not found'}), 404
@@ -472,21 +699,15 @@ def save_item_notes(item_id):
     app.logger.debug(f"DEBUG:save_notes:Received note text: {note_text}")
     
     # Get the worksheet for the Items sheet
-    spread = get_spread()
-    worksheet = spread.worksheet('Items')
+    spread = get_cached_spread()
+    worksheet = get_worksheet('Items')
     
     # Convert to records for ID-based lookup
     items = sheet_to_records(worksheet, is_routine_worksheet=False)
     
-    # Find the item with matching ID
-    target_item = None
-    target_row_idx = None
-    for idx, item in enumerate(items):
-        if item['A'] == str(item_id):  # Just convert route param to string once
-            target_item = item
-            target_row_idx = idx + 2  # +2 for 1-based index and header row
-            app.logger.debug(f"DEBUG:save_notes:Found item {item_id} at row {target_row_idx}")
-            break
+    # Map item ID -> (sheet row, record); +2 for 1-based index and header row
+    rows_by_id = {item['A']: (idx + 2, item) for idx, item in enumerate(items)}
+    target_row_idx, target_item = rows_by_id.get(str(item_id), (None, None))
     
     if target_item is None:
         app.logger.debug(f"DEBUG:save_notes:Item {item_id} not found!")
@@ -495,7 +716,8 @@ def save_item_notes(item_id):
     # Update the Notes column (column D)
     app.logger.debug(f"DEBUG:save_notes:Updating cell at row {target_row_idx}, col D with text: {note_text}")
     try:
-        worksheet.update(f'D{target_row_idx}', note_text)
+        with batch_writer(spread) as writer:
+            writer.update(f"Items!D{target_row_idx}", [[note_text]])
         app.logger.debug("DEBUG:save_notes:Update successful")
     except Exception as e:
         app.logger.error(f"DEBUG:save_notes:Error updating cell: {str(e)}")
@@ -505,35 +727,21 @@ def save_item_notes(item_id):
 
 @app.route('/items')
 def items_page():
-    """Render the items page"""
-    items = get_all_items()
-    return render_template('items.html.jinja', items=items)
+    """Render the items page; the list is fetched client-side from /api/items"""
+    return render_template('items.html.jinja')
 
 @app.route('/api/routines/<int:routine_id>/items/<int:item_id>/complete', methods=['PUT'])
 def toggle_item_complete(routine_id, item_id):
     """Toggle completion state of an item in a routine"""
     try:
         app.logger.debug(f"Toggling completion for item {item_id} in routine {routine_id}")
-        try:
-            # Use routine_id directly as sheet name
-            spread = get_spread()
-            worksheet = spread.worksheet(str(routine_id))  # Sheet name is the routine ID
-            app.logger.debug(f"Got worksheet for routine {routine_id}")
-        except Exception as sheet_error:
-            app.logger.error(f"Failed to get worksheet: {str(sheet_error)}")
-            return jsonify({'error': f"Failed to get worksheet: {str(sheet_error)}"}), 500
-        
-        # Find the row with this routine entry ID (column A)
-        items = sheet_to_records(worksheet, is_routine_worksheet=True)
-        app.logger.debug(f"Converted sheet to records, got {len(items)} items")
-        
-        row_idx = None
-        for idx, item in enumerate(items):
-            app.logger.debug(f"Checking item: {item}")  # Debug log
-            if item['A'] == str(item_id):  # Look for routine entry ID in column A
-                row_idx = idx + 2  # +2 because sheets is 1-based and has header row
-                app.logger.debug(f"Found item at row {row_idx}")
-                break
+        spread = get_cached_spread()
+        
+        # Find the row with this routine entry ID (column A); re-read once on a
+        # miss in case the cached map predates the entry
+        row_idx = get_routine_row_map(spread, routine_id).get(str(item_id))
+        if row_idx is None:
+            row_idx = get_routine_row_map(spread, routine_id, refresh=True).get(str(item_id))
         
         if row_idx is None:
             app.logger.error(f"Item {item_id} not found in routine {routine_id}")
@@ -541,40 +749,10 @@ def toggle_item_complete(routine_id, item_id):
 
         # Get the current completed state
         completed = request.json.get('completed', False)
-        app.logger.debug(f"Setting completed state to: {completed}")
-        
-        # Use 'TRUE' for completed, empty string for not completed
-        completed_value = 'TRUE' if completed else ' '  # Use a space instead of empty string
-        app.logger.debug(f"About to update cell D{row_idx} to {completed_value}")
-        try:
-            # Get current value before update
-            current_value = worksheet.acell(f'D{row_idx}').value
-            app.logger.debug(f"Current value in D{row_idx}: {current_value}")
-            
-            # Use batch_update to clear the cell if needed
-            if completed:
-                worksheet.update(f'D{row_idx}', completed_value)
-            else:
-                worksheet.batch_clear([f'D{row_idx}'])
-            
-            # Verify the update
-            new_value = worksheet.acell(f'D{row_idx}').value
-            app.logger.debug(f"New value in D{row_idx}: {new_value}")
-            
-            # For uncompleted items, None or empty string is success
-            if completed and new_value == completed_value or not completed and (new_value is None or new_value == ''):
-                app.logger.debug(f"Successfully updated cell D{row_idx}")
-            else:
-                app.logger.error(f"Update failed - value is still {new_value}")
-                return jsonify({'error': f"Update failed - value is still {new_value}"}), 500
-                
-        except Exception as update_error:
-            app.logger.error(f"Failed to update cell: {str(update_error)}")
-            app.logger.error(f"Error type: {type(update_error)}")
-            app.logger.error(f"Error details: {update_error.__dict__}")
-            return jsonify({'error': f"Failed to update cell: {str(update_error)}"}), 500
+        app.logger.debug(f"Queueing completed state {completed} for entry {item_id} in routine {routine_id}")
+        queue_completion_toggle(routine_id, item_id, completed)
         
-        return jsonify({'success': True, 'completed': completed})
+        return jsonify({'success': True, 'completed': completed}), 202
     except Exception as e:
         app.logger.error(f"Error toggling item completion: {str(e)}")
         app.logger.error(f"Error type: {type(e)}")
@@ -586,18 +764,12 @@ def reset_routine_progress(routine_id):
     """Reset all items' completion state in a routine"""
     try:
         app.logger.debug(f"Resetting progress for routine: {routine_id}")
-        spread = get_spread()
-        worksheet = spread.worksheet(str(routine_id))  # Use ID as sheet name
-        
-        # Get all items
-        items = sheet_to_records(worksheet, is_routine_worksheet=True)
+        spread = get_cached_spread()
         
-        # Create a list of empty strings for all data rows
-        if items:  # Only update if there are rows to update
-            empty_values = [[''] for _ in range(len(items))]
-            # Update all cells in column D starting from D2
-            range_end = f'D{len(items) + 1}'  # +1 because items doesn't include header row
-            worksheet.update(f'D2:{range_end}', empty_values)
+        # Column D only holds the completed flag, so clear it from row 2 down
+        # in one request instead of reading the sheet to size a blank update
+        with batch_writer(spread) as writer:
+            writer.clear(f"{routine_id}!D2:D")
         
         app.logger.debug("Reset complete")
         return jsonify({'success': True})
@@ -606,61 +778,21 @@ def reset_routine_progress(routine_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/practice/active-routine', methods=['GET'])
+# The view cache key ignores Accept, so MessagePack responses skip it (the
+# routine bundle underneath is still cached)
+@cache.cached(timeout=API_CACHE_TTL, query_string=True, unless=wants_msgpack, response_filter=cache_ok_only)
 def get_active_routine_with_details():
     """Get the active routine with all item details for the Practice page."""
     try:
         # Get active routine ID
         active_id = get_active_routine()
         if not active_id:
-            return jsonify({"active_id": None, "items": []})
+            return ojson({"active_id": None, "items": []})
 
-        spread = get_spread()
-        
-        # Batch get all required data
-        batch_data = spread.values_batch_get([
-            f"Routines!A2:D",  # Get routine metadata
-            f"{active_id}!A2:D",  # Get routine items
-            "Items!A2:H"  # Get items data
-        ])
-        
-        # Process routine metadata
-        routines_data = batch_data['valueRanges'][0].get('values', [])
-        routine_meta = next((
-            {'A': r[0], 'B': r[1], 'C': r[2], 'D': r[3]} 
-            for r in routines_data 
-            if r[0] == str(active_id)
-        ), None)
+        routine_meta, routine_items, items_by_id = _load_routine_bundle(active_id)
         
         if not routine_meta:
-            return jsonify({"error": "Active routine not found in Routines sheet"}), 404
-
-        # Process routine items
-        routine_items_data = batch_data['valueRanges'][1].get('values', [])
-        routine_items = [
-            {
-                'A': r[0],  # ID
-                'B': r[1],  # Item ID
-                'C': r[2],  # Order
-                'D': r[3] if len(r) > 3 and r[3] == 'TRUE' else ''  # Completed
-            }
-            for r in routine_items_data
-        ]
-
-        # Process items data
-        items_data = batch_data['valueRanges'][2].get('values', [])
-        items_by_id = {
-            r[0]: {  # Index by ID (column A)
-                'A': r[0],  # ID
-                'B': r[1],  # Item ID
-                'C': r[2],  # Title
-                'D': r[3],  # Notes
-                'E': r[4],  # Duration
-                'F': r[5],  # Description
-                'G': r[6],  # Order
-                'H': r[7] if len(r) > 7 else ''  # Tuning
-            }
-            for r in items_data
-        }
+            return ojson({"error": "Active routine not found in Routines sheet"}, 404)
 
         # Combine routine items with their details
         items_with_details = []
@@ -675,7 +807,7 @@ def get_active_routine_with_details():
         # Sort items by order (Column C)
         items_with_details.sort(key=lambda x: int(x['routineEntry']['C']) if x['routineEntry']['C'] else 0)
 
-        return jsonify({
+        return negotiate({
             "active_id": active_id,
             "name": routine_meta['B'],  # Column B contains the routine name
             "items": items_with_details
@@ -683,39 +815,82 @@ def get_active_routine_with_details():
 
     except Exception as e:
         app.logger.error(f"Error getting active routine with details: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
+
+@app.route('/api/practice/active-routine/stream', methods=['GET'])
+def stream_active_routine_with_details():
+    """Same data as /api/practice/active-routine, streamed one item at a time.
+
+    Default output is a JSON document written incrementally; ?format=ndjson emits a
+    header line ({"active_id", "name"}) followed by one item object per line.
+    """
+    try:
+        active_id = get_active_routine()
+        if not active_id:
+            return ojson({"active_id": None, "items": []})
+
+        routine_meta, routine_items, items_by_id = _load_routine_bundle(active_id)
+        
+        if not routine_meta:
+            return ojson({"error": "Active routine not found in Routines sheet"}, 404)
+
+        # Sort entries by order (Column C) before streaming
+        routine_items = sorted(routine_items, key=lambda x: int(x['C']) if x['C'] else 0)
+        header = {"active_id": active_id, "name": routine_meta['B']}
+
+        def item_chunks():
+            for routine_item in routine_items:
+                yield orjson.dumps({
+                    "routineEntry": routine_item,
+                    "itemDetails": items_by_id.get(routine_item['B'], {})
+                })
+
+        if request.args.get('format') == 'ndjson':
+            def generate_ndjson():
+                yield orjson.dumps(header) + b'\n'
+                for chunk in item_chunks():
+                    yield chunk + b'\n'
+            return Response(generate_ndjson(), mimetype='application/x-ndjson')
+
+        def generate_json():
+            # Reopen the header object to append the items array
+            yield orjson.dumps(header)[:-1] + b',"items":['
+            first = True
+            for chunk in item_chunks():
+                yield chunk if first else b',' + chunk
+                first = False
+            yield b']}'
+        return Response(generate_json(), mimetype='application/json')
+
+    except Exception as e:
+        app.logger.error(f"Error streaming active routine: {str(e)}")
+        return ojson({"error": str(e)}, 500)
 
 @app.route('/api/practice/active-routine/lightweight', methods=['GET'])
+@cache.cached(timeout=API_CACHE_TTL, query_string=True, response_filter=cache_ok_only)
 def get_active_routine_lightweight():
     """Get the active routine with minimal data - only titles and basic info for collapsed view."""
     try:
         # Get active routine ID
         active_id = get_active_routine()
         if not active_id:
-            return jsonify({"active_id": None, "items": []})
+            return ojson({"active_id": None, "items": []}, etag=True)
 
-        spread = get_spread()
+        spread = get_cached_spread()
         
         # Batch get only essential data - no full item details
         batch_data = spread.values_batch_get([
-            f"Routines!A2:D",  # Get routine metadata
             f"{active_id}!A2:D",  # Get routine items
             "Items!A2:D"  # Get ID, Item ID, and Title (columns A, B, C)
         ])
         
-        # Process routine metadata
-        routines_data = batch_data['valueRanges'][0].get('values', [])
-        routine_meta = next((
-            {'A': r[0], 'B': r[1], 'C': r[2], 'D': r[3]} 
-            for r in routines_data 
-            if r[0] == str(active_id)
-        ), None)
+        routine_meta = get_routines_map().get(str(active_id))
         
         if not routine_meta:
-            return jsonify({"error": "Active routine not found in Routines sheet"}), 404
+            return ojson({"error": "Active routine not found in Routines sheet"}, 404)
 
         # Process routine items
-        routine_items_data = batch_data['valueRanges'][1].get('values', [])
+        routine_items_data = batch_data['valueRanges'][0].get('values', [])
         routine_items = [
             {
                 'A': r[0],  # ID
@@ -727,7 +902,7 @@ def get_active_routine_lightweight():
         ]
 
         # Process minimal items data (only ID and Title)
-        items_data = batch_data['valueRanges'][2].get('values', [])
+        items_data = batch_data['valueRanges'][1].get('values', [])
         items_by_id = {
             r[1]: {  # Index by Item ID (column B) - this is what routine items reference
                 'A': r[0],  # ID (column A)
@@ -736,39 +911,35 @@ def get_active_routine_lightweight():
             for r in items_data
         }
 
-        # Combine routine items with minimal details
-        items_with_minimal_details = []
+        # Combine routine items with minimal details, paired with their numeric order (Column C)
+        ordered = []
         for routine_item in routine_items:
             item_id = routine_item['B']  # Item ID from routine's column B
             item_minimal = items_by_id.get(item_id, {})
-            items_with_minimal_details.append({
+            order = int(routine_item['C']) if routine_item['C'] else 0
+            ordered.append((order, {
                 "routineEntry": routine_item,
                 "itemMinimal": item_minimal
-            })
+            }))
         
-        # Sort items by order (Column C)
-        items_with_minimal_details.sort(key=lambda x: int(x['routineEntry']['C']) if x['routineEntry']['C'] else 0)
+        # Sort items by order; itemgetter keeps ties stable without comparing the dicts
+        ordered.sort(key=itemgetter(0))
+        items_with_minimal_details = [entry for _, entry in ordered]
 
-        return jsonify({
+        return ojson({
             "active_id": active_id,
             "name": routine_meta['B'],  # Column B contains the routine name
             "items": items_with_minimal_details
-        })
+        }, etag=True)
 
     except Exception as e:
         app.logger.error(f"Error getting lightweight active routine: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
 
 def batch_items(items: List[Dict], batch_size: int = 5) -> List[List[Dict]]:
     """Split items into batches of 5"""
     return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
 
-def exponential_backoff(attempt: int) -> None:
-    """Wait with exponential backoff, starting with a longer base delay"""
-    base_delay = 5  # Start with 5 seconds
-    delay = min(base_delay * math.pow(2, attempt), 30)  # Cap at 30 seconds
-    time.sleep(delay)
-
 @app.route('/api/items/bulk', methods=['POST'])
 def bulk_import_items():
     """Handle bulk import of items by appending them to the Items sheet"""
@@ -781,14 +952,23 @@ def bulk_import_items():
 
     try:
         # Get the Items sheet
-        spread = get_spread()
-        items_sheet = spread.worksheet('Items')
-        
-        # Find first empty row (row 1 is header)
-        first_empty_row = len(items_sheet.col_values(1)) + 1
-        next_id = first_empty_row - 1  # Row number minus header row
+        spread = get_cached_spread()
+        items_sheet = get_worksheet('Items')
+        
+        # Number new items after the highest existing ID so every row is written
+        # complete in one append (a failed follow-up write can't leave ID-less rows).
+        # This one-column read is deliberate: IDs taken from the append's
+        # updatedRange need a second write, and a per-process cached max ID goes
+        # stale under several workers or add_item, handing out duplicate IDs
+        existing_ids = spread.values_get('Items!A2:A').get('values', [])
+        max_id = 0
+        for row in existing_ids:
+            try:
+                max_id = max(max_id, _to_id(row[0]))
+            except (IndexError, ValueError):
+                continue
+        next_id = max_id + 1
         
-        # Convert items to rows
         rows = []
         for idx, item in enumerate(items):
             row_id = str(next_id + idx)
@@ -804,8 +984,9 @@ def bulk_import_items():
             ])
         
         if rows:
-            # Append the rows
-            items_sheet.append_rows(rows, value_input_option='USER_ENTERED')
+            # Sheets finds the first empty row server-side
+            items_sheet.append_rows(rows, value_input_option='USER_ENTERED',
+                                    insert_data_option='INSERT_ROWS', table_range='A1')
         
         return jsonify({
             "success": True,
@@ -836,21 +1017,23 @@ def records_to_sheet(worksheet, records, is_routine_worksheet=False):
             row.append(record.get(col, ''))
         rows.append(row)
     
-    # Calculate range
+    # Calculate range - extend beyond our data to clear rows left over from a longer list
     range_start = f'A2'
-    range_end = f'{col_end}{len(rows) + 1}'  # +1 because we start at row 2
-    range_str = f'{range_start}:{range_end}'
+    data_end_row = len(rows) + 1  # +1 because we start at row 2
+    clear_end_row = max(data_end_row + 50, 100)
+    range_str = f'{range_start}:{col_end}{clear_end_row}'
     app.logger.debug(f"Writing to range: {range_str}")
     app.logger.debug(f"Data rows to write: {rows}")
     
-    # Clear the range first
-    worksheet.batch_clear([f'A2:{col_end}'])
-    app.logger.debug(f"Clearing sheet range before write: A2:{col_end}")
+    # Pad with empty rows so one update both writes and clears (no separate batch_clear)
+    rows = rows + [[''] * num_cols] * (clear_end_row - data_end_row)
     
     # Write all data at once
     worksheet.update(range_str, rows, value_input_option='USER_ENTERED')
     app.logger.debug(f"Sheet update completed")
-    app.logger.debug(f"Updated sheet with {len(rows)} records")
+    app.logger.debug(f"Updated sheet with {len(records)} records")
+    if is_routine_worksheet:
+        remember_routine_records(worksheet, records)
     
     return True
 
@@ -873,13 +1056,13 @@ def bulk_import_routines():
                 return jsonify({"error": "Each routine must have a name"}), 400
 
         # Get current routines once at the start
-        spread = get_spread()
-        routines_sheet = spread.worksheet('Routines')
-        current_records = sheet_to_records(routines_sheet, is_routine_worksheet=True)
+        spread = get_cached_spread()
+        routines_sheet = get_worksheet('Routines')
+        current_records = get_routine_records(routines_sheet)
         
-        # Get the next available ID and order
-        next_id = str(max([int(r['A']) for r in current_records], default=0) + 1)
-        next_order = str(max([int(r['D']) for r in current_records], default=0) + 1)
+        # Get the next available ID and order; new routines take consecutive values
+        base_id = max((int(r['A']) for r in current_records if r['A'].isdigit()), default=0) + 1
+        base_order = max((int(r['D']) for r in current_records if r['D'].isdigit()), default=0) + 1
         
         # Generate timestamp in our format
         now = datetime.now()
@@ -887,39 +1070,36 @@ def bulk_import_routines():
         
         # Process all routines first, accumulating them in memory
         imported_routines = []
-        for routine in routines:
+        add_sheet_requests = []
+        for i, routine in enumerate(routines):
             new_routine = {
-                'A': next_id,      # ID
-                'B': routine['name'],  # Name
-                'C': timestamp,    # Created
-                'D': next_order    # Order
+                'A': str(base_id + i),     # ID
+                'B': routine['name'],      # Name
+                'C': timestamp,            # Created
+                'D': str(base_order + i)   # Order
             }
             current_records.append(new_routine)
             imported_routines.append(new_routine)
             
-            # Create the routine's worksheet using ID as name
-            worksheet = spread.add_worksheet(str(next_id), rows=1000, cols=20)
-            # Add header row
+            # Each routine gets its own worksheet, named by ID
+            add_sheet_requests.append({'addSheet': {'properties': {
+                'title': new_routine['A'],
+                'gridProperties': {'rowCount': 1000, 'columnCount': 20}
+            }}})
+
+        # Create every worksheet in one batchUpdate, then write all header rows in one values call
+        if add_sheet_requests:
+            spread.batch_update({'requests': add_sheet_requests})
             header_row = ['ID', 'Item ID', 'order', 'completed']
-            worksheet.update('A1:D1', [header_row])
-            
-            next_id = str(int(next_id) + 1)
-            next_order = str(int(next_order) + 1)
-
-        # Write all records in one batch with exponential backoff
-        max_attempts = 5
-        attempt = 0
-        while attempt < max_attempts:
-            try:
-                records_to_sheet(routines_sheet, current_records, is_routine_worksheet=True)
-                break
-            except Exception as e:
-                app.logger.error(f"Error in batch write, attempt {attempt}: {str(e)}")
-                if "quota" in str(e).lower() and attempt < max_attempts - 1:
-                    exponential_backoff(attempt)
-                    attempt += 1
-                else:
-                    raise
+            with batch_writer(spread) as writer:
+                for new_routine in imported_routines:
+                    writer.update(f"{new_routine['A']}!A1:D1", [header_row])
+
+        # Write all records in one batch, retrying rate-limit errors with jittered backoff
+        retry_on_rate_limit(
+            lambda: records_to_sheet(routines_sheet, current_records, is_routine_worksheet=True),
+            max_retries=4, base_delay=1
+        )
 
         return jsonify({
             "success": True,
@@ -948,12 +1128,11 @@ def bulk_import_routine_items(routine_id):
 
         # Get all existing items to match against
         all_items = get_all_items()
-        items_by_title = {item['C'].lower(): item for item in all_items}  # Case-insensitive lookup
+        items_by_title = {item['C'].casefold(): item for item in all_items}  # Case-insensitive lookup
 
         # Get the worksheet for this routine
-        spread = get_spread()
-        worksheet = spread.worksheet(str(routine_id))
-        existing_routine_items = sheet_to_records(worksheet, is_routine_worksheet=True)
+        worksheet = get_worksheet(routine_id)
+        existing_routine_items = get_routine_records(worksheet)
         
         # Track which items are already in the routine
         existing_item_ids = {item['B'] for item in existing_routine_items}  # Set of item IDs
@@ -973,7 +1152,7 @@ def bulk_import_routine_items(routine_id):
                 continue
             
             # Look for exact match first (case-insensitive)
-            matching_item = items_by_title.get(title.lower())
+            matching_item = items_by_title.get(title.casefold())
             
             if matching_item:
                 # Only add if not already in routine
@@ -1001,9 +1180,11 @@ def bulk_import_routine_items(routine_id):
                 "not_found": not_found_titles
             }), 400
 
-        # Add all new items to the worksheet
-        all_items = existing_routine_items + items_to_add
-        success = records_to_sheet(worksheet, all_items, is_routine_worksheet=True)
+        # Append the new entries after the existing ones; nothing else in the sheet changes
+        rows = [[entry['A'], entry['B'], entry['C'], entry['D']] for entry in items_to_add]
+        worksheet.append_rows(rows, value_input_option='USER_ENTERED', table_range='A1')
+        invalidate_routine_records(worksheet.title)
+        invalidate_routine_row_map(routine_id)
 
         response_data = {
             "imported": len(items_to_add),
@@ -1013,10 +1194,7 @@ def bulk_import_routine_items(routine_id):
         if not_found_titles:
             response_data["message"] = f"These items were not found, you'll need to create them, and add the Item IDs to the routine sheet: {', '.join(not_found_titles)}"
 
-        if success:
-            return jsonify(response_data)
-        else:
-            return jsonify({"error": "Failed to import items"}), 500
+        return jsonify(response_data)
 
     except Exception as e:
         app.logger.error(f"Error importing routine items: {str(e)}")
@@ -1032,31 +1210,24 @@ def update_routines_order():
         
         # Wrap the entire operation in retry logic
         def do_update():
-            # Get the Routines sheet
-            spread = get_spread()
-            routines_sheet = spread.worksheet('Routines')
+            spread = get_cached_spread()
             
-            # Get existing routines
-            existing_routines = sheet_to_records(routines_sheet, is_routine_worksheet=True)
+            # Read only the ID column to find each routine's row
+            ids = spread.values_get("Routines!A2:A").get('values', [])
             
             # Create a map of ID to new order
             order_map = {update['A']: update['D'] for update in updates}
             
-            # Update orders for routines that are in the updates
-            for routine in existing_routines:
-                if routine['A'] in order_map:
-                    routine['D'] = order_map[routine['A']]
-            
-            # Write back to sheet
-            success = records_to_sheet(routines_sheet, existing_routines, is_routine_worksheet=True)
+            # Write just the changed order cells (column D); +2 for 1-based index and header row
+            with batch_writer(spread, value_input_option='USER_ENTERED') as writer:
+                for idx, row in enumerate(ids):
+                    if row and row[0] in order_map:
+                        writer.update(f"Routines!D{idx + 2}", [[order_map[row[0]]]])
+            invalidate_routine_records('Routines')
             
-            if not success:
-                raise Exception("Failed to write updated order to sheet")
-                
-            return success
+            return True
         
         # Use retry logic with exponential backoff
-        from app.sheets import retry_on_rate_limit
         success = retry_on_rate_limit(do_update, max_retries=3, base_delay=2)
         
         if success:
@@ -1085,10 +1256,13 @@ def open_folder():
         
         # In WSL, we'll use explorer.exe to open Windows File Explorer
         try:
-            # Use the Windows path directly with explorer.exe
-            subprocess.run(['explorer.exe', windows_path], check=True)
+            # Use the Windows path directly with explorer.exe. Don't wait for it:
+            # Explorer can linger, and its exit code isn't a reliable failure signal
+            subprocess.Popen(['explorer.exe', windows_path],
+                             stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL, close_fds=True)
             return jsonify({'success': True})
-        except subprocess.CalledProcessError as e:
+        except OSError as e:
             app.logger.error(f"Failed to open folder: {str(e)}")
             return jsonify({'error': f'Failed to open folder: {str(e)}'}), 500
 
@@ -1096,6 +1270,8 @@ def open_folder():
         app.logger.error(f"Error in open_folder: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+_PUNCT_RE = re.compile(r'[^\w\s]')
+
 @app.route('/api/items/update-songbook-paths', methods=['POST'])
 def update_songbook_paths():
     """Bulk update songbook paths based on folder names matching item titles."""
@@ -1105,8 +1281,8 @@ def update_songbook_paths():
             return jsonify({'error': 'No paths provided'}), 400
 
         # Get all items
-        spread = get_spread()
-        items_sheet = spread.worksheet('Items')
+        spread = get_cached_spread()
+        items_sheet = get_worksheet('Items')
         items = sheet_to_records(items_sheet, is_routine_worksheet=False)
 
         # Extract folder names and create a mapping
@@ -1115,36 +1291,43 @@ def update_songbook_paths():
         # Function to normalize strings for comparison
         def normalize(s):
             # Remove special characters and convert to lowercase
-            return re.sub(r'[^\w\s]', '', s).lower().strip()
+            return _PUNCT_RE.sub('', s).lower().strip()
 
         # Create normalized versions of folder names for matching
         norm_folder_map = {normalize(name): path for name, path in zip(folder_names, folder_paths)}
+        choices = list(norm_folder_map)
+
+        def best_match(norm_title):
+            if norm_title in norm_folder_map:  # Exact match, no fuzzy scoring needed
+                return norm_title
+            # Plain edit-distance similarity, same 0.8 bar as the old difflib cutoff
+            match = fuzz_process.extractOne(norm_title, choices, scorer=fuzz.ratio, score_cutoff=80)
+            return match[0] if match else None
 
         # Track updates
         updates = []
         updated_count = 0
 
-        # Process each item
-        for item in items:
-            title = item['C']  # Column C is Title
-            norm_title = normalize(title)
-            
-            # Try to find a matching folder
-            matches = get_close_matches(norm_title, norm_folder_map.keys(), n=1, cutoff=0.8)
-            
-            if matches:
-                matched_folder = matches[0]
-                folder_path = norm_folder_map[matched_folder]
+        # Process each item; matched paths are written together after the loop
+        with batch_writer(spread, value_input_option='USER_ENTERED') as writer:
+            for row_idx, item in enumerate(items, start=2):  # start=2: 1-based index plus header row
+                title = item['C']  # Column C is Title
+                norm_title = normalize(title)
                 
-                # Update the item's songbook path (Column F)
-                row_idx = items.index(item) + 2  # +2 for 1-based index and header row
-                items_sheet.update(f'F{row_idx}', folder_path)
+                # Try to find a matching folder
+                matched_folder = best_match(norm_title)
                 
-                updates.append({
-                    'title': title,
-                    'path': folder_path
-                })
-                updated_count += 1
+                if matched_folder is not None:
+                    folder_path = norm_folder_map[matched_folder]
+                    
+                    # Update the item's songbook path (Column F)
+                    writer.update(f'Items!F{row_idx}', [[folder_path]])
+                    
+                    updates.append({
+                        'title': title,
+                        'path': folder_path
+                    })
+                    updated_count += 1
 
         return jsonify({
             'success': True,
@@ -1167,31 +1350,25 @@ def batch_chord_charts():
         if not item_ids:
             return jsonify([])
         
-        # Get all chord charts from the sheet once
-        from app.sheets import get_spread, sheet_to_records, initialize_chordcharts_sheet
-        import json
+        # Get all chord charts once (shared short-lived cache, dropped on chart writes)
+        
+        all_records = get_chord_chart_records()
         
-        spread = get_spread()
-        initialize_chordcharts_sheet()
-        sheet = spread.worksheet('ChordCharts')
-        all_records = sheet_to_records(sheet, is_routine_worksheet=False)
+        # Index charts by item ID in one pass (column B may list several comma-separated IDs)
+        charts_by_item = defaultdict(list)
+        for r in all_records:
+            for rid in r.get('B', '').split(','):
+                charts_by_item[rid.strip()].append(r)
         
         # Build result dict for all requested items
         result = {}
         
         for item_id in item_ids:
-            item_id_str = str(item_id)
-            item_charts = []
-            
-            # Filter records for this item
-            for r in all_records:
-                item_ids_in_record = r.get('B', '').split(',')
-                item_ids_in_record = [id.strip() for id in item_ids_in_record]
-                if item_id_str in item_ids_in_record:
-                    item_charts.append(r)
+            # Copy so sorting doesn't reorder the shared index list
+            item_charts = list(charts_by_item.get(str(item_id), ()))
             
             # Sort by Order (column F)
-            item_charts.sort(key=lambda x: int(float(x.get('F', 0))))
+            item_charts.sort(key=lambda x: _to_id(x.get('F', 0)))
             
             # Parse ChordData JSON for each chart
             parsed_charts = []
@@ -1203,7 +1380,7 @@ def batch_chord_charts():
                         app.logger.warning(f"Skipping chord chart {chart.get('A', 'unknown')} with empty/corrupted data")
                         continue
                         
-                    chart_data = json.loads(chord_data_raw)
+                    chart_data = parse_chord_data(chart.get('A'), chord_data_raw)
                     
                     # Validate essential chord data exists
                     if not chart_data or not isinstance(chart_data, dict):
@@ -1215,7 +1392,7 @@ def batch_chord_charts():
                         'itemId': item_id,
                         'title': chart.get('C', ''),
                         'createdAt': chart.get('E', ''),
-                        'order': int(float(chart.get('F', 0))),
+                        'order': _to_id(chart.get('F', 0)),
                         **chart_data
                     }
                     parsed_charts.append(parsed_chart)
@@ -1503,17 +1680,17 @@ def copy_chord_charts_route():
     """Copy chord charts from one song to multiple other songs."""
     try:
         if not request.is_json:
-            return jsonify({"error": "Request must be JSON"}), 400
+            return ojson({"error": "Request must be JSON"}, 400)
         
-        data = request.json
+        data = orjson.loads(request.get_data())
         source_item_id = data.get('source_item_id')
         target_item_ids = data.get('target_item_ids', [])
         
         if not source_item_id:
-            return jsonify({"error": "source_item_id is required"}), 400
+            return ojson({"error": "source_item_id is required"}, 400)
             
         if not target_item_ids or not isinstance(target_item_ids, list):
-            return jsonify({"error": "target_item_ids must be a non-empty array"}), 400
+            return ojson({"error": "target_item_ids must be a non-empty array"}, 400)
         
         app.logger.info(f"Copying chord charts from item {source_item_id} to items {target_item_ids}")
         
@@ -1521,7 +1698,7 @@ def copy_chord_charts_route():
         
         app.logger.info(f"Successfully copied {result['charts_found']} chord charts to {len(result['target_items'])} items")
         
-        return jsonify({
+        return ojson({
             'success': True,
             'message': f"Copied {result['charts_found']} chord charts to {len(result['target_items'])} songs",
             'result': result
@@ -1529,39 +1706,75 @@ def copy_chord_charts_route():
         
     except Exception as e:
         app.logger.error(f"Error copying chord charts: {str(e)}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojson({'success': False, 'error': str(e)}, 500)
+
+FRONTEND_LOG_LEVELS = {
+    'ERROR': logging.ERROR,
+    'WARNING': logging.WARNING,
+    'INFO': logging.INFO,
+    'DEBUG': logging.DEBUG,
+}
 
 @app.route('/api/debug/log', methods=['POST'])
 def debug_log_route():
     """Endpoint for frontend to send debug logs to backend."""
     try:
         if not request.is_json:
-            return jsonify({"error": "Request must be JSON"}), 400
+            return ojson({"error": "Request must be JSON"}, 400)
         
-        data = request.json
-        message = data.get('message', '')
+        data = orjson.loads(request.get_data())
         level = data.get('level', 'DEBUG')
-        context = data.get('context', {})
+        lvl = FRONTEND_LOG_LEVELS.get(str(level).upper(), logging.INFO)
+        # Nothing to format when the logger would drop the record anyway
+        if not app.logger.isEnabledFor(lvl):
+            return ojson({'success': True})
         
-        # Format the message with context if provided
+        message = data.get('message', '')
+        context = data.get('context', {})
         if context:
-            formatted_message = f"[FRONTEND {level}] {message} | Context: {context}"
-        else:
-            formatted_message = f"[FRONTEND {level}] {message}"
-        
-        # Log at appropriate level
-        if level.upper() == 'ERROR':
-            app.logger.error(formatted_message)
-        elif level.upper() == 'WARNING':
-            app.logger.warning(formatted_message)
+            app.logger.log(lvl, "[FRONTEND %s] %s | Context: %r", level, message, context)
         else:
-            app.logger.info(formatted_message)
+            app.logger.log(lvl, "[FRONTEND %s] %s", level, message)
         
-        return jsonify({'success': True}), 200
+        return ojson({'success': True})
         
     except Exception as e:
         app.logger.error(f"Error in debug log endpoint: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return ojson({'error': str(e)}, 500)
+
+# Read once at import (run.py loads .env first); autocreate answers 500 without it
+_ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
+if not _ANTHROPIC_API_KEY:
+    app.logger.warning("ANTHROPIC_API_KEY is not set; chord chart autocreate is disabled")
+
+# Autocreate uploads are read in 64KB chunks (see process_file)
+UPLOAD_CHUNK_SIZE = 64 * 1024
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+# The autocreate view refuses larger request bodies before parsing them (1MB of
+# slack for the multipart framing and form fields around the file). Only that
+# view is capped; the JSON bulk imports aren't.
+MAX_UPLOAD_REQUEST_BYTES = MAX_UPLOAD_BYTES + 1024 * 1024
+
+_IMAGE_MEDIA_TYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'jpeg': 'image/jpeg'}
+_SUPPORTED_IMAGE_EXTS = frozenset(_IMAGE_MEDIA_TYPES)
+
+@dataclass
+class UploadedFile:
+    """One autocreate upload
+
+    Sent to Claude by file_id once it is on the Files API (see upload_to_files_api);
+    otherwise as base64, encoded on first use and then reused.
+    """
+    name: str
+    type: str  # 'pdf' or 'image'
+    raw: bytes
+    sha256: str
+    media_type: str
+    file_id: Optional[str] = None
+
+    @cached_property
+    def data_b64(self):
+        return base64.b64encode(self.raw).decode('ascii')
 
 @app.route('/api/autocreate-chord-charts', methods=['POST'])
 def autocreate_chord_charts():
@@ -1569,15 +1782,20 @@ def autocreate_chord_charts():
     try:
         app.logger.debug("Starting autocreate chord charts process")
         
-        # Check if files were uploaded
-        if not request.files:
-            return jsonify({'error': 'No files uploaded'}), 400
+        if (request.content_length or 0) > MAX_UPLOAD_REQUEST_BYTES:
+            return ojson({'error': 'Upload is too large (max 10MB)'}, 413)
+        
+        # Exactly one file per request (simplified approach)
+        if len(request.files) != 1:
+            if not request.files:
+                return ojson({'error': 'No files uploaded'}, 400)
+            return ojson({'error': 'Please upload only one file at a time for autocreate'}, 400)
             
         item_id = request.form.get('itemId')
         if not item_id:
-            return jsonify({'error': 'No itemId provided'}), 400
+            return ojson({'error': 'No itemId provided'}, 400)
             
-        app.logger.debug(f"Processing files for item ID: {item_id}")
+        app.logger.debug("Processing files for item ID: %s", item_id)
         
         # Process uploaded files - simplified single collection
         uploaded_files = []
@@ -1592,105 +1810,366 @@ def autocreate_chord_charts():
             if not filename:
                 return None
                 
-            # Check file size (10MB limit)
-            file.seek(0, os.SEEK_END)
-            file_size = file.tell()
-            file.seek(0)
-            
-            if file_size > 10 * 1024 * 1024:  # 10MB
-                return {'error': f'File {filename} is too large (max 10MB)'}
-                
-            # Read file content
-            file_data = file.read()
-            
             # Determine file type
             file_ext = filename.lower().split('.')[-1] if '.' in filename else ''
-            
-            if file_ext == 'pdf':
-                # For PDFs, we'll send the raw bytes and let Claude handle it
-                return {
-                    'name': filename,
-                    'type': 'pdf',
-                    'data': base64.b64encode(file_data).decode('utf-8')
-                }
-            elif file_ext in ['png', 'jpg', 'jpeg']:
-                # For images, encode as base64
-                return {
-                    'name': filename,
-                    'type': 'image',
-                    'data': base64.b64encode(file_data).decode('utf-8'),
-                    'media_type': f'image/{file_ext if file_ext != "jpg" else "jpeg"}'
-                }
-            else:
+            if file_ext != 'pdf' and file_ext not in _SUPPORTED_IMAGE_EXTS:
                 return {'error': f'Unsupported file type: {file_ext}'}
-        
-        # Process single uploaded file only (simplified approach)
-        files_list = list(request.files.values())
-        if len(files_list) > 1:
-            return jsonify({'error': 'Please upload only one file at a time for autocreate'}), 400
-        
-        if len(files_list) == 0:
-            return jsonify({'error': 'No file uploaded'}), 400
             
+            # Stream the upload in chunks, hashing as we go, and stop as soon as it
+            # passes the 10MB limit. Base64 is left to UploadedFile.data_b64.
+            hasher = hashlib.sha256()
+            chunks = []
+            total = 0
+            while chunk := file.stream.read(UPLOAD_CHUNK_SIZE):
+                total += len(chunk)
+                if total > MAX_UPLOAD_BYTES:
+                    return {'error': f'File {filename} is too large (max 10MB)'}
+                hasher.update(chunk)
+                chunks.append(chunk)
+            
+            is_pdf = file_ext == 'pdf'
+            return UploadedFile(
+                name=filename,
+                type='pdf' if is_pdf else 'image',
+                raw=b''.join(chunks),
+                # Content hash, so repeat uploads of the same file can reuse cached results
+                sha256=hasher.hexdigest(),
+                media_type='application/pdf' if is_pdf else _IMAGE_MEDIA_TYPES[file_ext],
+            )
+        
         # Process the single file
-        file = files_list[0]
+        file = next(iter(request.files.values()))
         result = process_file(file)
         if result:
-            if 'error' in result:
-                return jsonify(result), 400
+            if isinstance(result, dict):
+                return ojson(result, 400)
             uploaded_files.append(result)
-        
-        app.logger.info(f"Processed 1 file for analysis: {result.get('name', 'unknown')}")
+            app.logger.info("Processed 1 file for analysis: %s", result.name)
                 
         if not uploaded_files:
-            return jsonify({'error': 'No valid file found'}), 400
+            return ojson({'error': 'No valid file found'}, 400)
             
         # Check if user provided a choice for mixed content
         user_choice = request.form.get('userChoice')
         if user_choice:
-            app.logger.info(f"[AUTOCREATE] User chose to process files as: {user_choice}")
-            app.logger.info(f"[AUTOCREATE] Processing {len(uploaded_files)} files with user choice override")
-            # Override file type detection with user choice
-            for file_data in uploaded_files:
-                file_data['forced_type'] = user_choice
+            app.logger.info("[AUTOCREATE] User chose to process files as: %s", user_choice)
+            app.logger.info("[AUTOCREATE] Processing %s files with user choice override", len(uploaded_files))
         else:
-            app.logger.info(f"[AUTOCREATE] No user choice provided, will use automatic detection")
+            app.logger.info("[AUTOCREATE] No user choice provided, will use automatic detection")
             
-        # Get Anthropic API key from environment
-        api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not api_key:
-            return jsonify({'error': 'Anthropic API key not configured'}), 500
+        if not _ANTHROPIC_API_KEY:
+            return ojson({'error': 'Anthropic API key not configured'}, 500)
             
-        # Initialize Anthropic client
-        client = anthropic.Anthropic(api_key=api_key)
-        app.logger.info(f"[AUTOCREATE] Anthropic client initialized successfully")
+        client = get_anthropic_client()
         
         # Prepare the Claude analysis request
-        app.logger.info(f"[AUTOCREATE] Starting Claude analysis for item {item_id}")
+        app.logger.info("[AUTOCREATE] Starting Claude analysis for item %s", item_id)
         app.logger.debug("Sending files to Claude for analysis")
         
         # Create the analysis prompt
-        analysis_result = analyze_files_with_claude(client, uploaded_files, item_id)
-        app.logger.info(f"[AUTOCREATE] Claude analysis completed, result type: {type(analysis_result)}")
+        analysis_result = run_claude(
+            analyze_files_with_claude(client, uploaded_files, item_id, forced_type=user_choice),
+            no_cache=request.args.get('no_cache') == '1',
+        )
+        app.logger.info("[AUTOCREATE] Claude analysis completed, result type: %s", type(analysis_result))
         
         app.logger.debug("Claude analysis complete, creating chord charts")
         
-        return jsonify(analysis_result)
+        return ojson(analysis_result)
         
     except Exception as e:
-        app.logger.error(f"Error in autocreate chord charts: {str(e)}")
-        return jsonify({'error': str(e)}), 500
-
-def analyze_reference_diagrams_only(client, reference_files):
-    """Step 1: Pure visual analysis of chord diagrams with focused prompt"""
+        app.logger.error("Error in autocreate chord charts: %s", e)
+        return ojson({'error': str(e)}, 500)
+
+# Claude calls run as coroutines on one long-lived event loop in a daemon thread.
+# The AsyncAnthropic client's connection pool is bound to that loop, so the client
+# is created once and reused by every request instead of per call; request
+# threads hand their coroutine over with run_claude() and block on the result.
+CLAUDE_MAX_CONCURRENCY = 5
+ANTHROPIC_TIMEOUT = 120.0  # seconds; Opus visual analysis can take a while
+ANTHROPIC_CONNECT_TIMEOUT = 10.0
+# Upper bound on one whole autocreate run (several Claude calls, throttle waits
+# and the Sheets writes) before the request thread gives up on it
+CLAUDE_RUN_TIMEOUT = float(os.getenv('CLAUDE_RUN_TIMEOUT', '600'))
+
+# Anthropic tier limits; calls wait locally instead of being rejected with a 429
+ANTHROPIC_RPM = int(os.getenv('ANTHROPIC_RPM', '50'))
+ANTHROPIC_TPM = int(os.getenv('ANTHROPIC_TPM', '40000'))
+# Rough input cost of one attached image/PDF when estimating a call's tokens
+FILE_TOKEN_ESTIMATE = 2000
+
+class ClaudeThrottle:
+    """Token-bucket limiter for requests- and tokens-per-minute
+
+    Both capacities refill continuously up to their per-minute limit. reserve()
+    waits until one request and the estimated tokens are available, takes them,
+    and holds one of max_concurrency slots while the call runs.
+    """
+
+    def __init__(self, rpm, tpm, max_concurrency):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.available_request_capacity = float(rpm)
+        self.available_token_capacity = float(tpm)
+        self._last_update = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    def _replenish(self):
+        now = time.monotonic()
+        elapsed = now - self._last_update
+        self._last_update = now
+        self.available_request_capacity = min(
+            self.rpm, self.available_request_capacity + self.rpm * elapsed / 60)
+        self.available_token_capacity = min(
+            self.tpm, self.available_token_capacity + self.tpm * elapsed / 60)
+
+    async def _acquire(self, tokens):
+        tokens = min(tokens, self.tpm)  # An oversize call still goes out once the bucket is full
+        async with self._lock:
+            while True:
+                self._replenish()
+                if self.available_request_capacity >= 1 and self.available_token_capacity >= tokens:
+                    self.available_request_capacity -= 1
+                    self.available_token_capacity -= tokens
+                    return
+                wait = max(
+                    (1 - self.available_request_capacity) * 60 / self.rpm,
+                    (tokens - self.available_token_capacity) * 60 / self.tpm,
+                )
+                app.logger.info("[AUTOCREATE] Throttling Claude call for %.1fs", wait)
+                await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def reserve(self, estimated_tokens):
+        async with self._slots:
+            await self._acquire(estimated_tokens)
+            yield
+
+_claude_throttle = ClaudeThrottle(ANTHROPIC_RPM, ANTHROPIC_TPM, CLAUDE_MAX_CONCURRENCY)
+
+_claude_loop = None
+_claude_loop_lock = threading.Lock()
+_anthropic_client = None
+_anthropic_client_lock = threading.Lock()
+
+def _get_claude_loop():
+    global _claude_loop
+    with _claude_loop_lock:
+        if _claude_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='claude-loop', daemon=True).start()
+            _claude_loop = loop
+        return _claude_loop
+
+def get_anthropic_client():
+    """Shared AsyncAnthropic client (SDK imported lazily; only autocreate needs it)
+
+    One keep-alive connection pool serves every autocreate request, so only the
+    first call pays the TLS handshake to api.anthropic.com.
+    """
+    global _anthropic_client
+    with _anthropic_client_lock:
+        if _anthropic_client is None:
+            import anthropic
+            import httpx
+            timeout = httpx.Timeout(ANTHROPIC_TIMEOUT, connect=ANTHROPIC_CONNECT_TIMEOUT)
+            _anthropic_client = anthropic.AsyncAnthropic(
+                api_key=_ANTHROPIC_API_KEY,
+                max_retries=3,
+                timeout=timeout,
+                http_client=anthropic.DefaultAsyncHttpxClient(
+                    timeout=timeout,
+                    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                ),
+            )
+            app.logger.info("[AUTOCREATE] Anthropic client initialized")
+        return _anthropic_client
+
+# Claude responses are cached on disk by content hash (app/llm_cache.py).
+# LLM_CACHE_ENABLED=0 turns that off; ?no_cache=1 skips cache reads for one request.
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', '1') == '1'
+_llm_cache_bypass = contextvars.ContextVar('llm_cache_bypass', default=False)
+
+def claude_cache_key(prompt_text, uploaded_files, model):
+    """sha256 over the prompt, the files' content hashes and the model id"""
+    h = hashlib.sha256(prompt_text.encode())
+    for f in uploaded_files:
+        h.update(f.sha256.encode())
+    h.update(model.encode())
+    return h.hexdigest()
+
+def llm_cache_get(key):
+    if not LLM_CACHE_ENABLED or _llm_cache_bypass.get():
+        return None
+    return llm_cache.get(key)
+
+def llm_cache_set(key, response_text):
+    if LLM_CACHE_ENABLED:
+        llm_cache.set(key, response_text)
+
+async def _bypassing_llm_cache(coro):
+    # Tasks the coroutine creates copy this context, so they see the bypass too
+    _llm_cache_bypass.set(True)
+    return await coro
+
+def run_claude(coro, no_cache=False):
+    """Run a coroutine on the Claude event loop and wait up to CLAUDE_RUN_TIMEOUT for its result"""
+    if no_cache:
+        coro = _bypassing_llm_cache(coro)
+    future = asyncio.run_coroutine_threadsafe(coro, _get_claude_loop())
     try:
-        # Create focused visual analysis prompt for chord diagrams
-        message_content = [
-            {
-                "type": "text", 
-                "text": f"""🎸 **CHORD DIAGRAM VISUAL ANALYSIS WITH LAYOUT STRUCTURE**
+        return future.result(timeout=CLAUDE_RUN_TIMEOUT)
+    except TimeoutError:
+        future.cancel()  # Cancels the task on the loop too
+        raise TimeoutError(f"Claude analysis did not finish within {CLAUDE_RUN_TIMEOUT:.0f}s")
+
+def estimate_claude_tokens(kwargs):
+    """Rough token cost of a messages.create() call: ~4 chars per token plus max_tokens"""
+    tokens = kwargs.get('max_tokens', 0)
+    for message in kwargs.get('messages', []):
+        content = message['content']
+        if isinstance(content, str):
+            tokens += len(content) // 4
+            continue
+        for block in content:
+            if block.get('type') == 'text':
+                tokens += len(block['text']) // 4
+            else:
+                tokens += FILE_TOKEN_ESTIMATE
+    return tokens
+
+# Uploads go to the (beta) Files API once and are referenced by file_id, so the
+# base64 payload isn't rebuilt and resent for every call. File ids are cached
+# by content hash; ANTHROPIC_FILES_API=0 falls back to inline base64.
+ANTHROPIC_FILES_API = os.getenv('ANTHROPIC_FILES_API', '1') == '1'
+FILES_API_BETA = 'files-api-2025-04-14'
+# Kept short so a file deleted on Anthropic's side is re-uploaded soon; a
+# rejected file_id is also dropped and re-uploaded on the spot (see
+# _call_with_fresh_files)
+FILES_API_CACHE_TTL_DAYS = 7
+# file_id -> UploadedFile for the uploads of in-flight requests, so a stale id in
+# a request body can be traced back to the bytes to re-upload
+_uploads_by_file_id = weakref.WeakValueDictionary()
+
+def _messages_api(client, kwargs):
+    if ANTHROPIC_FILES_API:
+        return client.beta.messages, {**kwargs, 'betas': [FILES_API_BETA]}
+    return client.messages, kwargs
+
+async def upload_to_files_api(client, uploaded_files):
+    """Set file_id on each upload, uploading only content the API hasn't seen yet
+
+    A failed upload leaves file_id unset and that file goes inline as base64.
+    """
+    if not ANTHROPIC_FILES_API:
+        return
+    for f in uploaded_files:
+        if f.file_id:
+            continue
+        cache_key = f"anthropic-file:{f.sha256}"
+        f.file_id = llm_cache.get(cache_key)
+        if not f.file_id:
+            try:
+                uploaded = await client.beta.files.upload(file=(f.name, f.raw, f.media_type))
+            except Exception as e:
+                app.logger.warning("[AUTOCREATE] Files API upload failed for %s, sending inline: %s", f.name, e)
+                continue
+            f.file_id = uploaded.id
+            llm_cache.set(cache_key, uploaded.id, ttl_days=FILES_API_CACHE_TTL_DAYS)
+            app.logger.info("[AUTOCREATE] Uploaded %s to the Files API as %s", f.name, uploaded.id)
+        _uploads_by_file_id[f.file_id] = f
+
+def _is_stale_file_error(e):
+    """A 404, or a 400 that names a file: a cached file_id was deleted or expired"""
+    status = getattr(e, 'status_code', None)
+    return status == 404 or (status == 400 and 'file' in str(e).lower())
+
+async def _refresh_stale_files(client, kwargs):
+    """Re-upload the files referenced by file_id in kwargs and repoint their blocks
+
+    Returns False when the request references no file we can re-upload.
+    """
+    sources = [
+        block['source']
+        for message in kwargs.get('messages', [])
+        if not isinstance(message['content'], str)
+        for block in message['content']
+        if block.get('source', {}).get('type') == 'file'
+    ]
+    files = {}
+    for source in sources:
+        f = _uploads_by_file_id.get(source['file_id'])
+        if f is not None:
+            files[source['file_id']] = f
+    if not files:
+        return False
+    for f in files.values():
+        llm_cache.delete(f"anthropic-file:{f.sha256}")
+        f.file_id = None
+    await upload_to_files_api(client, list(files.values()))
+    for source in sources:
+        f = files.get(source['file_id'])
+        if f is not None:
+            source.clear()
+            source.update(_file_source(f))
+    return True
 
-You are analyzing {len(reference_files)} reference chord diagram files.
+async def _call_with_fresh_files(client, kwargs, call):
+    """await call(messages_api, kwargs), re-uploading and retrying once if a file_id was rejected"""
+    messages, kwargs = _messages_api(client, kwargs)
+    try:
+        return await call(messages, kwargs)
+    except Exception as e:
+        if not (ANTHROPIC_FILES_API and _is_stale_file_error(e)
+                and await _refresh_stale_files(client, kwargs)):
+            raise
+        app.logger.warning("[AUTOCREATE] Files API rejected a cached file_id, retrying after re-upload: %s", e)
+    return await call(messages, kwargs)
+
+async def _create(messages, kwargs):
+    return await messages.create(**kwargs)
+
+async def _stream_text(messages, kwargs):
+    async with messages.stream(**kwargs) as stream:
+        text = ''.join([text async for text in stream.text_stream])
+        final = await stream.get_final_message()
+    # The API leaves the matched stop sequence out of the text; put it back so
+    # the reply reads as if generation had ended naturally
+    if final.stop_reason == 'stop_sequence' and final.stop_sequence:
+        text += final.stop_sequence
+    return text
+
+async def claude_messages_create(client, **kwargs):
+    """client.messages.create() behind the RPM/TPM throttle and concurrency cap"""
+    async with _claude_throttle.reserve(estimate_claude_tokens(kwargs)):
+        return await _call_with_fresh_files(client, kwargs, _create)
+
+async def claude_stream_text(client, **kwargs):
+    """Like claude_messages_create(), but streams the reply and returns its text
+
+    Used for the long chord extractions so the body arrives incrementally rather
+    than in one response after generation finishes.
+    """
+    async with _claude_throttle.reserve(estimate_claude_tokens(kwargs)):
+        return await _call_with_fresh_files(client, kwargs, _stream_text)
+
+def _with_app_context(func, *args):
+    with app.app_context():
+        return func(*args)
+
+async def run_blocking(func, *args):
+    """Run a blocking (Sheets) call in a worker thread so the Claude loop stays free"""
+    return await asyncio.to_thread(_with_app_context, func, *args)
+
+# Claude prompts are built once at import; only the visual analysis prompt has a
+# placeholder ({num_files}), so its literal braces are doubled for str.format()
+# The chord prompts are sent as a cache_control breakpoint ahead of the uploaded
+# files, so Anthropic's prompt cache reuses them across calls
+PROMPT_CACHE_CONTROL = {"type": "ephemeral"}
+_VISUAL_ANALYSIS_PROMPT = """🎸 **CHORD DIAGRAM VISUAL ANALYSIS WITH LAYOUT STRUCTURE**
+
+You are analyzing {num_files} reference chord diagram files.
 
 **FUNDAMENTAL RULE**: If the file contains chord charts, that's the user's way of asking you to use exactly the chord chart fingerings/shapes and chord chart names seen in the reference image. DO NOT substitute standard tuning patterns - use only what you actually see in the chord charts in the uploaded file.
 
@@ -1771,55 +2250,8 @@ You are analyzing {len(reference_files)} reference chord diagram files.
 ```
 
 """
-            }
-        ]
-        
-        # Add reference chord files (process both images and PDFs)
-        for ref_file in reference_files:
-            if ref_file.get('type') == 'image':
-                message_content.append({
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": ref_file['media_type'],
-                        "data": ref_file['data']
-                    }
-                })
-            elif ref_file.get('type') == 'pdf':
-                message_content.append({
-                    "type": "document", 
-                    "source": {
-                        "type": "base64",
-                        "media_type": ref_file['media_type'],
-                        "data": ref_file['data']
-                    }
-                })
-            else:
-                # Log unsupported file types but continue processing
-                print(f"INFO: Unsupported reference file type for '{ref_file.get('name')}', skipping")
-        
-        # Use Opus for superior visual analysis
-        response = client.messages.create(
-            model="claude-opus-4-1-20250805",
-            max_tokens=4000,
-            messages=[{
-                "role": "user",
-                "content": message_content
-            }]
-        )
-        
-        return response.content[0].text
-        
-    except Exception as e:
-        raise Exception(f"Visual analysis failed: {str(e)}")
 
-def detect_file_types_with_sonnet(client, uploaded_files):
-    """Detect file types using Sonnet 4 model"""
-    try:
-        app.logger.info("Using Sonnet 4 to detect file types and content")
-        
-        # Build message content with files for analysis
-        prompt_text = """🎸 **FILE TYPE DETECTION FOR GUITAR CONTENT**
+_FILE_TYPE_DETECTION_PROMPT = """🎸 **FILE TYPE DETECTION FOR GUITAR CONTENT**
 
 Analyze the uploaded files and determine their content types. You need to categorize each file as either:
 
@@ -1870,180 +2302,9 @@ Return JSON with this exact structure:
 
 Analyze the files below:"""
 
-        message_content = [{
-            "type": "text",
-            "text": prompt_text
-        }]
+_CHORD_CHARTS_PROMPT = """🎸 **Hey Claude! Visual Chord Diagram Analysis**
 
-        # Add all files for analysis
-        for file_content in uploaded_files:
-            name = file_content['name']
-            
-            # Add file label
-            message_content.append({
-                "type": "text",
-                "text": f"\n\n**FILE: {name}**"
-            })
-            
-            if file_content['type'] == 'pdf':
-                message_content.append({
-                    "type": "document",
-                    "source": {
-                        "type": "base64",
-                        "media_type": "application/pdf",
-                        "data": file_content['data']
-                    }
-                })
-            elif file_content['type'] == 'image':
-                message_content.append({
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": file_content['media_type'],
-                        "data": file_content['data']
-                    }
-                })
-
-        # Use Sonnet 4 for file type detection
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=3000,
-            messages=[{
-                "role": "user",
-                "content": message_content
-            }]
-        )
-        
-        response_text = response.content[0].text
-        
-        # Parse JSON response
-        import re
-        json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            # Try to find JSON without markdown wrapper
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-            else:
-                # Fallback to chord_names if no JSON found
-                app.logger.warning("Could not parse file type detection response, defaulting to chord_names")
-                return {
-                    "primary_type": "chord_names",
-                    "has_mixed_content": True,
-                    "content_types": ["chord_names."],
-                    "analysis": {"error": "Could not parse detection response"}
-                }
-        
-        result = json.loads(json_str)
-        app.logger.info(f"File type detection result: {result.get('primary_type', 'unknown')} (mixed: {result.get('has_mixed_content', True)})")
-        return result
-        
-    except Exception as e:
-        app.logger.error(f"File type detection failed: {str(e)}")
-        # Default to chord_names processing on error
-        return {
-            "primary_type": "chord_names", 
-            "has_mixed_content": True,
-            "content_types": ["tablature"],
-            "analysis": {"error": str(e)}
-        }
-
-def analyze_files_with_claude(client, uploaded_files, item_id):
-    """Simplified analysis: detect file type and process accordingly"""
-    try:
-        app.logger.info(f"[AUTOCREATE] analyze_files_with_claude called with {len(uploaded_files)} files for item {item_id}")
-        
-        # Check if user forced a type choice
-        forced_type = None
-        for file_data in uploaded_files:
-            if 'forced_type' in file_data:
-                forced_type = file_data['forced_type']
-                break
-                
-        if forced_type:
-            app.logger.info(f"[AUTOCREATE] User forced processing as: {forced_type}")
-            # Skip detection, go straight to processing
-            if forced_type == 'chord_charts':
-                app.logger.info(f"[AUTOCREATE] Processing as chord charts (user choice)")
-                return process_chord_charts_directly(client, uploaded_files, item_id)
-            elif forced_type == 'chord_names':
-                app.logger.info(f"[AUTOCREATE] Processing as chord names (user choice)")
-                return process_chord_names_with_lyrics(client, uploaded_files, item_id)
-            else:
-                app.logger.warning(f"[AUTOCREATE] Unknown forced type: {forced_type}, falling back to chord names")
-                return process_chord_names_with_lyrics(client, uploaded_files, item_id)
-        
-        # Step 1: File type detection using Sonnet 4
-        app.logger.info(f"[AUTOCREATE] Step 1: Analyzing {len(uploaded_files)} files to detect content type using Sonnet 4")
-        file_type_result = detect_file_types_with_sonnet(client, uploaded_files)
-        
-        # Step 2: Process based on detected content type
-        if file_type_result.get('has_mixed_content'):
-            # TODO: Return data for mixed content modal (Steven's requirement #2)
-            return {
-                'needs_user_choice': True,
-                'mixed_content_options': file_type_result.get('content_types', []),
-                'files': uploaded_files
-            }
-        
-        # Process based on primary content type
-        primary_type = file_type_result.get('primary_type', 'chord_names')
-        app.logger.info(f"Processing files as: {primary_type}")
-        
-        # Step 3: Process files based on detected type
-        if primary_type == 'chord_charts':
-            return process_chord_charts_directly(client, uploaded_files, item_id)
-        elif primary_type == 'chord_names':
-            return process_chord_names_with_lyrics(client, uploaded_files, item_id)
-        elif primary_type == 'tablature':
-            return {
-                'error': 'unsupported_format',
-                'message': 'Sorry, we can only build chord charts. We can\'t process tablature here.',
-                'title': 'Tablature Not Supported'
-            }
-        elif primary_type == 'sheet_music':
-            return {
-                'error': 'unsupported_format', 
-                'message': 'Sorry, we can only build chord charts. We can\'t process sheet music here.',
-                'title': 'Sheet Music Not Supported'
-            }
-        else:
-            # Fallback to chord names processing (most common case)
-            app.logger.warning(f"Unknown primary_type '{primary_type}', falling back to chord names processing")
-            return process_chord_names_with_lyrics(client, uploaded_files, item_id)
-        
-    except TimeoutError as e:
-        app.logger.error(f"Claude API timeout: {str(e)}")
-        return {'error': 'Analysis timed out. Please try with fewer or smaller files.'}
-    except Exception as e:
-        app.logger.error(f"Error in Claude analysis: {str(e)}")
-        # Check if it's an API error with more specific message
-        error_msg = str(e)
-        if 'rate_limit' in error_msg.lower() or '429' in error_msg:
-            return {'error': 'Error code: 429 - API rate limit reached. Please wait a moment and try again.'}
-        elif 'overloaded' in error_msg.lower() or '529' in error_msg:
-            return {'error': 'Error code: 529 - API servers are temporarily overloaded. Please try again in a moment.'}
-        elif '500' in error_msg or 'internal server error' in error_msg.lower():
-            return {'error': 'Error code: 500 - Server error occurred. Please try again shortly.'}
-        elif '502' in error_msg or 'bad gateway' in error_msg.lower():
-            return {'error': 'Error code: 502 - Service temporarily unavailable. Please try again.'}
-        elif '503' in error_msg or 'service unavailable' in error_msg.lower():
-            return {'error': 'Error code: 503 - Service temporarily unavailable. Please try again.'}
-        elif 'timeout' in error_msg.lower():
-            return {'error': 'Request timed out. Please try with fewer or smaller files.'}
-        else:
-            return {'error': f'Analysis failed: {str(e)}'}
-
-def process_chord_charts_directly(client, uploaded_files, item_id):
-    """Process files containing chord charts for direct import"""
-    try:
-        app.logger.info("Processing chord chart files for direct import")
-        
-        prompt_text = """🎸 **Hey Claude! Visual Chord Diagram Analysis**
-
-Hey there! I need your help with something really important. I'm asking you to look at guitar chord diagrams and extract the exact finger positions you see. This is tricky because I need you to be like a perfect camera - just tell me what's there, don't "correct" anything based on what you think it should be.
+Hey there! I need your help with something really important. I'm asking you to look at guitar chord diagrams and extract the exact finger positions you see. This is tricky because I need you to be like a perfect camera - just tell me what's there, don't "correct" anything based on what you think it should be.
 
 **🚨 REALLY IMPORTANT:** Here's the thing - please don't use any of your guitar knowledge here. I know you know what an "Em9" or "C7/G" chord typically looks like, but I need you to completely ignore that knowledge. Think of yourself as someone who's never seen a guitar chord before - you're just looking at dots and lines and telling me where the dots are positioned.
 
@@ -2146,77 +2407,7 @@ Make sense? You're being my eyes here, and I really appreciate the help!
 
 Thanks so much for being thorough with this, you rock Claude! 🤘🎸🚀"""
 
-        message_content = [{
-            "type": "text", 
-            "text": prompt_text
-        }]
-        
-        # Add all uploaded files
-        for file_content in uploaded_files:
-            name = file_content['name']
-            message_content.append({
-                "type": "text",
-                "text": f"\n\n**FILE: {name}**"
-            })
-            
-            if file_content['type'] == 'pdf':
-                message_content.append({
-                    "type": "document",
-                    "source": {
-                        "type": "base64",
-                        "media_type": "application/pdf", 
-                        "data": file_content['data']
-                    }
-                })
-            elif file_content['type'] == 'image':
-                message_content.append({
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": file_content['media_type'],
-                        "data": file_content['data'] 
-                    }
-                })
-        
-        # Use Opus 4.1 for superior visual analysis of chord diagrams
-        app.logger.info("Using Opus 4.1 for chord chart visual analysis")
-        response = client.messages.create(
-            model="claude-opus-4-1-20250805",
-            max_tokens=6000,
-            messages=[{
-                "role": "user",
-                "content": message_content
-            }]
-        )
-        
-        response_text = response.content[0].text
-        
-        # Parse JSON response
-        chord_data = parse_json_response(response_text)
-        if chord_data is None:
-            return {'error': 'Failed to parse chord chart data from analysis response'}
-        
-        # Create chord charts from the structured data  
-        created_charts = create_chord_charts_from_data(chord_data, item_id)
-        
-        return {
-            'success': True,
-            'message': f'Imported {len(created_charts)} chord charts',
-            'charts': created_charts,
-            'analysis': chord_data
-        }
-        
-    except Exception as e:
-        app.logger.error(f"Error processing chord charts: {str(e)}")
-        return {'error': f'Failed to process chord charts: {str(e)}'}
-
-def process_chord_names_with_lyrics(client, uploaded_files, item_id):
-    """Process files with chord names above lyrics using CommonChords lookup"""
-    try:
-        app.logger.info(f"[AUTOCREATE] process_chord_names_with_lyrics called with {len(uploaded_files)} files for item {item_id}")
-        app.logger.info("Processing chord names above lyrics with CommonChords lookup")
-        
-        prompt_text = """🎸 **Hey Claude! Chord Names from Lyrics Processing**
+_CHORD_NAMES_PROMPT = """🎸 **Hey Claude! Chord Names from Lyrics Processing**
 
 Hi there! This time I need your help with a different type of file - these are lyrics sheets with chord names written above the words (like "G" or "Am" or "F7" above the lyrics), NOT chord diagrams with dots and lines.
 
@@ -2271,104 +2462,443 @@ Thanks for helping me extract these chord progressions! This saves me tons of ti
 
 **One last technical note:** Please set lineBreakAfter: true for chords at the end of lines/phrases, and return only the JSON format shown above (no extra explanatory text). Thanks!"""
 
+# Message content block for an uploaded file, by UploadedFile.type
+def _file_source(f):
+    if f.file_id:
+        return {"type": "file", "file_id": f.file_id}
+    return {"type": "base64", "media_type": f.media_type, "data": f.data_b64}
+
+_TYPE_TO_BLOCK = {
+    'pdf': lambda f: {"type": "document", "source": _file_source(f)},
+    'image': lambda f: {"type": "image", "source": _file_source(f)},
+}
+
+def _make_source_block(file_content):
+    return _TYPE_TO_BLOCK[file_content.type](file_content)
+
+def _file_label_block(file_content):
+    return {"type": "text", "text": f"\n\n**FILE: {file_content.name}**"}
+
+async def analyze_reference_diagrams_only(client, reference_files):
+    """Step 1: Pure visual analysis of chord diagrams with focused prompt"""
+    try:
+        # Create focused visual analysis prompt for chord diagrams
+        message_content = [
+            {
+                "type": "text", 
+                "text": _VISUAL_ANALYSIS_PROMPT.format(num_files=len(reference_files))
+            }
+        ]
+        
+        # Add reference chord files (process both images and PDFs)
+        for ref_file in reference_files:
+            if ref_file.type in _TYPE_TO_BLOCK:
+                message_content.append(_make_source_block(ref_file))
+            else:
+                # Log unsupported file types but continue processing
+                app.logger.info("Unsupported reference file type for '%s', skipping", ref_file.name)
+        
+        # Use Opus for superior visual analysis
+        return await claude_stream_text(client,
+            model="claude-opus-4-1-20250805",
+            max_tokens=4000,
+            messages=[{
+                "role": "user",
+                "content": message_content
+            }]
+        )
+        
+    except Exception as e:
+        raise Exception(f"Visual analysis failed: {str(e)}")
+
+# Local pre-classification of PDFs with a text layer (see local_prefilter)
+_TAB_LINE_RE = re.compile(r'^\s*[eEBGDAbgda]\s*\|[-0-9hpbrx/\\~|]{8,}', re.MULTILINE)
+_CHORD_TOKEN_RE = re.compile(r'^[A-G][#b]?(?:m|maj|min|dim|aug|sus|add)?\d*(?:/[A-G][#b]?)?$')
+# Chord diagram residue in extracted text: position markers ("3fr") or rows of x/o
+_DIAGRAM_HINT_RE = re.compile(r'\b\d+\s?fr\b|^\s*(?:[xXoO]\s*){6}$', re.MULTILINE)
+PREFILTER_MIN_LINES = 4
+
+def local_prefilter(file_content) -> Optional[dict]:
+    """Classify an upload without Claude when its text makes the type obvious
+
+    Only PDFs with a text layer qualify (and only when pdfminer.six is installed):
+    several tab staff lines mean tablature, chord-only lines interleaved with
+    lyric lines mean chord_names. Anything else, including any hint of chord
+    diagrams, returns None so Sonnet decides.
+    """
+    if file_content.type != 'pdf' or pdf_extract_text is None:
+        return None
+    try:
+        text = pdf_extract_text(io.BytesIO(file_content.raw), maxpages=2)
+    except Exception as e:
+        app.logger.debug("Local prefilter could not read %s: %s", file_content.name, e)
+        return None
+    if not text or _DIAGRAM_HINT_RE.search(text):
+        return None
+    
+    primary_type = None
+    if len(_TAB_LINE_RE.findall(text)) >= PREFILTER_MIN_LINES:
+        primary_type = 'tablature'
+    else:
+        chord_lines = lyric_lines = 0
+        for line in text.splitlines():
+            tokens = line.split()
+            if not tokens:
+                continue
+            if all(_CHORD_TOKEN_RE.match(t) for t in tokens):
+                chord_lines += 1
+            elif len(tokens) >= 3:
+                lyric_lines += 1
+        if chord_lines >= PREFILTER_MIN_LINES and lyric_lines >= PREFILTER_MIN_LINES:
+            primary_type = 'chord_names'
+    if primary_type is None:
+        return None
+    return {
+        "primary_type": primary_type,
+        "has_mixed_content": False,
+        "content_types": [primary_type],
+        "analysis": {
+            "source": "local_prefilter",
+            "file_breakdown": [{
+                "filename": file_content.name,
+                "type": primary_type,
+                "confidence": "high",
+                "reason": "Classified from the PDF's text layer"
+            }]
+        }
+    }
+
+async def detect_file_types_with_sonnet(client, uploaded_files):
+    """Detect file types using Sonnet 4 model"""
+    try:
+        # Detection only depends on file contents, not names
+        cache_key = hashlib.sha256(b"|".join(sorted(f.sha256.encode() for f in uploaded_files))).hexdigest()
+        cached = llm_cache_get(cache_key)
+        if cached is not None:
+            result = orjson.loads(cached)
+            app.logger.info("File type detection cache hit: %s", result.get('primary_type', 'unknown'))
+            return result
+        
+        # Obvious cases (tab staves, chord-over-lyrics text) are classified locally
+        if len(uploaded_files) == 1:
+            result = await asyncio.to_thread(local_prefilter, uploaded_files[0])
+            if result is not None:
+                app.logger.info("File type detected locally: %s", result['primary_type'])
+                llm_cache_set(cache_key, orjson.dumps(result).decode())
+                return result
+        
+        app.logger.info("Using Sonnet 4 to detect file types and content")
+        
+        # Build message content with files for analysis
         message_content = [{
             "type": "text",
-            "text": prompt_text
+            "text": _FILE_TYPE_DETECTION_PROMPT
         }]
+
+        # Add all uploaded files, each preceded by its label
+        message_content.extend(chain.from_iterable(
+            [_file_label_block(f), _make_source_block(f)] for f in uploaded_files
+        ))
+
+        # Use Sonnet 4 for file type detection
+        response = await claude_messages_create(client,
+            model="claude-sonnet-4-20250514",
+            max_tokens=800,  # The detection JSON is a few hundred tokens
+            messages=[{
+                "role": "user",
+                "content": message_content
+            }]
+        )
         
-        # Add all uploaded files
-        for file_content in uploaded_files:
-            name = file_content['name']
-            message_content.append({
-                "type": "text", 
-                "text": f"\n\n**FILE: {name}**"
-            })
-            
-            if file_content['type'] == 'pdf':
-                message_content.append({
-                    "type": "document",
-                    "source": {
-                        "type": "base64",
-                        "media_type": "application/pdf", 
-                        "data": file_content['data']
-                    }
-                })
-            elif file_content['type'] == 'image':
-                message_content.append({
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": file_content['media_type'],
-                        "data": file_content['data']
-                    }
-                })
-        
-        # Use Sonnet 4 for chord names analysis (cost-efficient)
-        app.logger.info(f"[AUTOCREATE] Using Sonnet 4 for chord names analysis")
-        app.logger.info(f"[AUTOCREATE] Making API call with {len(message_content)} content items")
-        app.logger.info(f"[AUTOCREATE] Message content types: {[item.get('type', 'unknown') for item in message_content]}")
+        response_text = response.content[0].text
         
+        # Parse JSON response
+        json_match = _JSON_FENCE_RE.search(response_text)
+        if json_match:
+            json_str = json_match.group(1)
+        else:
+            # Try to find JSON without markdown wrapper
+            json_str = first_json_object(response_text)
         try:
-            app.logger.info(f"[AUTOCREATE] Starting Anthropic API call to claude-sonnet-4-20250514")
-            response = client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=8000,  # Increased for complex songs with multiple sections
-                temperature=0.1,
-                messages=[{"role": "user", "content": message_content}]
-            )
-            app.logger.info(f"[AUTOCREATE] API call successful, response received with {len(response.content)} content items")
-            if response.content:
-                app.logger.info(f"[AUTOCREATE] Response content length: {len(response.content[0].text) if response.content[0].text else 0} characters")
-        except Exception as api_error:
-            app.logger.error(f"[AUTOCREATE] API call failed: {str(api_error)}")
-            app.logger.error(f"[AUTOCREATE] API error type: {type(api_error)}")
-            return {'error': f'Claude API call failed: {str(api_error)}'}
+            result = orjson.loads(json_str) if json_str else None
+        except json.JSONDecodeError:
+            result = None
+        if not isinstance(result, dict):
+            # Fallback to chord_names if no JSON found
+            app.logger.warning("Could not parse file type detection response, defaulting to chord_names")
+            return {
+                "primary_type": "chord_names",
+                "has_mixed_content": True,
+                "content_types": ["chord_names."],
+                "analysis": {"error": "Could not parse detection response"}
+            }
+        app.logger.info("File type detection result: %s (mixed: %s)", result.get('primary_type', 'unknown'), result.get('has_mixed_content', True))
+        llm_cache_set(cache_key, json_str)
+        return result
+        
+    except Exception as e:
+        app.logger.error("File type detection failed: %s", e)
+        # Default to chord_names processing on error
+        return {
+            "primary_type": "chord_names", 
+            "has_mixed_content": True,
+            "content_types": ["tablature"],
+            "analysis": {"error": str(e)}
+        }
+
+# Opt-in: overlap the chord chart extraction with file type detection. Costs a
+# wasted Opus call (and throttle budget) whenever the file turns out not to be
+# chord charts, so it is off unless ENABLE_SPECULATIVE_EXTRACTION=1
+ENABLE_SPECULATIVE_EXTRACTION = os.getenv('ENABLE_SPECULATIVE_EXTRACTION', '0') == '1'
+
+def discard_speculation(task):
+    """Cancel a speculative task nobody awaited, or collect its unused exception"""
+    if task is None:
+        return
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled():
+        task.exception()
+
+async def analyze_files_with_claude(client, uploaded_files, item_id, forced_type=None):
+    """Simplified analysis: detect file type and process accordingly"""
+    speculative = None
+    try:
+        app.logger.info("[AUTOCREATE] analyze_files_with_claude called with %s files for item %s", len(uploaded_files), item_id)
+        
+        # Upload once; detection and both pipelines then share the file ids
+        await upload_to_files_api(client, uploaded_files)
+        
+        # forced_type is the user's choice from the mixed content prompt, if any
+        if forced_type:
+            app.logger.info("[AUTOCREATE] User forced processing as: %s", forced_type)
+            # Skip detection, go straight to processing
+            if forced_type == 'chord_charts':
+                app.logger.info("[AUTOCREATE] Processing as chord charts (user choice)")
+                return await process_chord_charts_directly(client, uploaded_files, item_id)
+            elif forced_type == 'chord_names':
+                app.logger.info("[AUTOCREATE] Processing as chord names (user choice)")
+                return await process_chord_names_with_lyrics(client, uploaded_files, item_id)
+            else:
+                app.logger.warning("[AUTOCREATE] Unknown forced type: %s, falling back to chord names", forced_type)
+                return await process_chord_names_with_lyrics(client, uploaded_files, item_id)
+        
+        # Step 1: File type detection using Sonnet 4
+        app.logger.info("[AUTOCREATE] Step 1: Analyzing %s files to detect content type using Sonnet 4", len(uploaded_files))
+        detect_task = asyncio.create_task(detect_file_types_with_sonnet(client, uploaded_files))
+        if ENABLE_SPECULATIVE_EXTRACTION:
+            # Chord charts are the common case, so start the Opus extraction alongside
+            # detection; it is discarded if detection says otherwise. A cached
+            # detection finishes on its first step and skips the speculation.
+            await asyncio.sleep(0)
+            if not detect_task.done():
+                speculative = asyncio.create_task(extract_chord_chart_data(client, uploaded_files))
+        file_type_result = await detect_task
+        
+        # Step 2: Process based on detected content type
+        if file_type_result.get('has_mixed_content'):
+            # TODO: Return data for mixed content modal (Steven's requirement #2)
+            return {
+                'needs_user_choice': True,
+                'mixed_content_options': file_type_result.get('content_types', []),
+                'files': [{'name': f.name, 'type': f.type} for f in uploaded_files]
+            }
+        
+        # Process based on primary content type
+        primary_type = file_type_result.get('primary_type', 'chord_names')
+        app.logger.info("Processing files as: %s", primary_type)
+        
+        # Step 3: Process files based on detected type
+        if primary_type == 'chord_charts':
+            return await process_chord_charts_directly(client, uploaded_files, item_id, extraction=speculative)
+        elif primary_type == 'chord_names':
+            return await process_chord_names_with_lyrics(client, uploaded_files, item_id)
+        elif primary_type == 'tablature':
+            return {
+                'error': 'unsupported_format',
+                'message': 'Sorry, we can only build chord charts. We can\'t process tablature here.',
+                'title': 'Tablature Not Supported'
+            }
+        elif primary_type == 'sheet_music':
+            return {
+                'error': 'unsupported_format', 
+                'message': 'Sorry, we can only build chord charts. We can\'t process sheet music here.',
+                'title': 'Sheet Music Not Supported'
+            }
+        else:
+            # Fallback to chord names processing (most common case)
+            app.logger.warning("Unknown primary_type '%s', falling back to chord names processing", primary_type)
+            return await process_chord_names_with_lyrics(client, uploaded_files, item_id)
+        
+    except TimeoutError as e:
+        app.logger.error("Claude API timeout: %s", e)
+        return {'error': 'Analysis timed out. Please try with fewer or smaller files.'}
+    except Exception as e:
+        app.logger.error("Error in Claude analysis: %s", e)
+        # Check if it's an API error with more specific message
+        error_msg = str(e)
+        if 'rate_limit' in error_msg.lower() or '429' in error_msg:
+            return {'error': 'Error code: 429 - API rate limit reached. Please wait a moment and try again.'}
+        elif 'overloaded' in error_msg.lower() or '529' in error_msg:
+            return {'error': 'Error code: 529 - API servers are temporarily overloaded. Please try again in a moment.'}
+        elif '500' in error_msg or 'internal server error' in error_msg.lower():
+            return {'error': 'Error code: 500 - Server error occurred. Please try again shortly.'}
+        elif '502' in error_msg or 'bad gateway' in error_msg.lower():
+            return {'error': 'Error code: 502 - Service temporarily unavailable. Please try again.'}
+        elif '503' in error_msg or 'service unavailable' in error_msg.lower():
+            return {'error': 'Error code: 503 - Service temporarily unavailable. Please try again.'}
+        elif 'timeout' in error_msg.lower():
+            return {'error': 'Request timed out. Please try with fewer or smaller files.'}
+        else:
+            return {'error': f'Analysis failed: {str(e)}'}
+    finally:
+        discard_speculation(speculative)
+
+async def extract_chord_chart_data(client, uploaded_files):
+    """Ask Opus for the chord diagrams in the files; returns parsed JSON or None
+
+    Has no side effects, so analyze_files_with_claude can start it speculatively
+    while file type detection is still running.
+    """
+    message_content = [{
+        "type": "text", 
+        "text": _CHORD_CHARTS_PROMPT,
+        "cache_control": PROMPT_CACHE_CONTROL
+    }]
+    
+    # Add all uploaded files, each preceded by its label
+    message_content.extend(chain.from_iterable(
+        [_file_label_block(f), _make_source_block(f)] for f in uploaded_files
+    ))
+    
+    # Use Opus 4.1 for superior visual analysis of chord diagrams
+    model = "claude-opus-4-1-20250805"
+    cache_key = claude_cache_key(_CHORD_CHARTS_PROMPT, uploaded_files, model)
+    response_text = llm_cache_get(cache_key)
+    if response_text is not None:
+        app.logger.info("Chord chart analysis served from the LLM cache")
+        return parse_json_response(response_text)
+    
+    app.logger.info("Using Opus 4.1 for chord chart visual analysis")
+    response_text = await claude_stream_text(client,
+        model=model,
+        max_tokens=6000,
+        stop_sequences=JSON_FENCE_STOP_SEQUENCES,
+        messages=[{
+            "role": "user",
+            "content": message_content
+        }]
+    )
+    
+    # Parse JSON response; only a usable answer is worth caching
+    chord_data = parse_json_response(response_text)
+    if chord_data is not None:
+        llm_cache_set(cache_key, response_text)
+    return chord_data
+
+async def process_chord_charts_directly(client, uploaded_files, item_id, extraction=None):
+    """Process files containing chord charts for direct import
+
+    extraction is an already-running extract_chord_chart_data() task to use
+    instead of starting a new Opus call.
+    """
+    try:
+        app.logger.info("Processing chord chart files for direct import")
+        
+        if extraction is None:
+            extraction = extract_chord_chart_data(client, uploaded_files)
+        chord_data = await extraction
+        if chord_data is None:
+            return {'error': 'Failed to parse chord chart data from analysis response'}
+        
+        # Create chord charts from the structured data  
+        created_charts = await run_blocking(create_chord_charts_from_data, chord_data, item_id)
+        
+        return {
+            'success': True,
+            'message': f'Imported {len(created_charts)} chord charts',
+            'charts': created_charts,
+            'analysis': chord_data
+        }
+        
+    except Exception as e:
+        app.logger.error("Error processing chord charts: %s", e)
+        return {'error': f'Failed to process chord charts: {str(e)}'}
+
+async def process_chord_names_with_lyrics(client, uploaded_files, item_id):
+    """Process files with chord names above lyrics using CommonChords lookup"""
+    try:
+        app.logger.info("[AUTOCREATE] process_chord_names_with_lyrics called with %s files for item %s", len(uploaded_files), item_id)
+        app.logger.info("Processing chord names above lyrics with CommonChords lookup")
+        
+        message_content = [{
+            "type": "text",
+            "text": _CHORD_NAMES_PROMPT,
+            "cache_control": PROMPT_CACHE_CONTROL
+        }]
+        
+        # Add all uploaded files, each preceded by its label
+        message_content.extend(chain.from_iterable(
+            [_file_label_block(f), _make_source_block(f)] for f in uploaded_files
+        ))
+        
+        # Use Sonnet 4 for chord names analysis (cost-efficient)
+        model = "claude-sonnet-4-20250514"
+        cache_key = claude_cache_key(_CHORD_NAMES_PROMPT, uploaded_files, model)
+        response_text = llm_cache_get(cache_key)
+        from_cache = response_text is not None
+        if from_cache:
+            app.logger.info("[AUTOCREATE] Chord names response served from the LLM cache")
+        else:
+            app.logger.info("[AUTOCREATE] Using Sonnet 4 for chord names analysis")
+            app.logger.info("[AUTOCREATE] Making API call with %s content items", len(message_content))
+            app.logger.info("[AUTOCREATE] Message content types: %s", [item.get('type', 'unknown') for item in message_content])
+            
+            try:
+                app.logger.info("[AUTOCREATE] Starting Anthropic API call to %s", model)
+                response_text = await claude_stream_text(client,
+                    model=model,
+                    max_tokens=8000,  # Increased for complex songs with multiple sections
+                    temperature=0.1,
+                    stop_sequences=JSON_FENCE_STOP_SEQUENCES,
+                    messages=[{"role": "user", "content": message_content}]
+                )
+                app.logger.info("[AUTOCREATE] API call successful, response content length: %s characters", len(response_text))
+            except Exception as api_error:
+                app.logger.error("[AUTOCREATE] API call failed: %s", api_error)
+                app.logger.error("[AUTOCREATE] API error type: %s", type(api_error))
+                return {'error': f'Claude API call failed: {str(api_error)}'}
+            
+            response_text = response_text.strip()
         
         # Parse Claude's response
-        response_text = response.content[0].text.strip()
-        app.logger.info(f"[AUTOCREATE] Parsing Claude response for chord names")
-        app.logger.info(f"[AUTOCREATE] Claude response preview: {response_text[:500]}...")
+        app.logger.info("[AUTOCREATE] Parsing Claude response for chord names")
+        app.logger.info("[AUTOCREATE] Claude response preview: %s...", response_text[:500])
         
         if not response_text:
             app.logger.error("Empty response from Claude API")
             return {'error': 'Empty response from Claude API'}
             
         # Try to extract JSON from response (might be wrapped in markdown)
+        json_match = _JSON_FENCE_RE.search(response_text)
+        json_text = json_match.group(1) if json_match else response_text
         try:
-            # Look for JSON block in markdown
-            if '```json' in response_text:
-                json_start = response_text.find('```json') + 7
-                json_end = response_text.find('```', json_start)
-                json_text = response_text[json_start:json_end].strip()
-            else:
-                json_text = response_text
-                
-            chord_data = json.loads(json_text)
+            chord_data = orjson.loads(json_text)
         except json.JSONDecodeError as parse_error:
-            app.logger.error(f"[AUTOCREATE] Failed to parse JSON response: {parse_error}")
-            app.logger.error(f"[AUTOCREATE] Parse error location: line {getattr(parse_error, 'lineno', 'unknown')} column {getattr(parse_error, 'colno', 'unknown')}")
-            app.logger.error(f"[AUTOCREATE] Response length: {len(response_text)} characters")
-            app.logger.error(f"[AUTOCREATE] Response preview (first 1000 chars): {response_text[:1000]}")
-            app.logger.error(f"[AUTOCREATE] Response end (last 500 chars): {response_text[-500:]}")
-            
-            # Try to extract JSON from markdown code blocks if present
-            import re
-            json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+            app.logger.error("[AUTOCREATE] Failed to parse JSON response: %s", parse_error)
+            app.logger.error("[AUTOCREATE] Parse error location: line %s column %s", getattr(parse_error, 'lineno', 'unknown'), getattr(parse_error, 'colno', 'unknown'))
+            app.logger.error("[AUTOCREATE] Response length: %s characters", len(response_text))
+            app.logger.error("[AUTOCREATE] Response preview (first 1000 chars): %s", response_text[:1000])
+            app.logger.error("[AUTOCREATE] Response end (last 500 chars): %s", response_text[-500:])
             if json_match:
-                try:
-                    clean_json = json_match.group(1)
-                    app.logger.info(f"[AUTOCREATE] Found JSON in markdown, attempting to parse {len(clean_json)} chars")
-                    chord_data = json.loads(clean_json)
-                    app.logger.info(f"[AUTOCREATE] Successfully parsed JSON from markdown!")
-                except json.JSONDecodeError as clean_parse_error:
-                    app.logger.error(f"[AUTOCREATE] Even markdown-extracted JSON failed to parse: {clean_parse_error}")
-                    return {'error': f'Failed to parse chord chart data - JSON truncated or malformed. Error: {str(parse_error)}'}
-            else:
-                app.logger.error(f"[AUTOCREATE] No markdown JSON blocks found in response")
-                return {'error': f'Failed to parse chord chart data from analysis response: {str(parse_error)}'}
+                return {'error': f'Failed to parse chord chart data - JSON truncated or malformed. Error: {str(parse_error)}'}
+            return {'error': f'Failed to parse chord chart data from analysis response: {str(parse_error)}'}
+        
+        if not from_cache:
+            llm_cache_set(cache_key, response_text)
         
         # Create chord charts from the structured data using CommonChords lookup
-        created_charts = create_chord_charts_from_data(chord_data, item_id)
+        created_charts = await run_blocking(create_chord_charts_from_data, chord_data, item_id)
         
         return {
             'success': True,
@@ -2378,36 +2908,86 @@ Thanks for helping me extract these chord progressions! This saves me tons of ti
         }
         
     except Exception as e:
-        app.logger.error(f"Error processing chord names: {str(e)}")
+        app.logger.error("Error processing chord names: %s", e)
         return {'error': f'Failed to process chord names: {str(e)}'}
 
 
+# The chord prompts ask for a ```json block; stopping where the top-level object
+# closes into the fence ends generation (and billing) as soon as the JSON is
+# complete. An opening fence (tagged or not) can't match this, and
+# claude_stream_text() appends the matched sequence back onto the reply.
+JSON_FENCE_STOP_SEQUENCES = ["}\n```"]
+_JSON_FENCE_RE = re.compile(r'```json\s*(.*?)\s*(?:```|$)', re.DOTALL)
+
+def first_json_object(text):
+    """Return the first brace-balanced {...} substring of text, or None
+
+    Skips braces inside JSON strings (honouring backslash escapes) and stops at
+    the first complete object instead of greedily running to the last '}'.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
 def parse_json_response(response_text):
     """Helper function to parse JSON from Claude's response"""
     try:
-        import re
         # Find JSON in the response (Claude might wrap it in markdown)
-        json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+        json_match = _JSON_FENCE_RE.search(response_text)
         if json_match:
             json_str = json_match.group(1)
         else:
             # Try to find JSON without markdown wrapper
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-            else:
+            json_str = first_json_object(response_text)
+            if json_str is None:
                 app.logger.error("No valid JSON found in Claude's response")
-                app.logger.error(f"Response was: {response_text}")
+                app.logger.error("Response was: %s", response_text)
                 return None
         
-        chord_data = json.loads(json_str)
+        chord_data = orjson.loads(json_str)
         return chord_data
         
     except (json.JSONDecodeError, ValueError) as e:
-        app.logger.error(f"Failed to parse Claude's response as JSON: {e}")
-        app.logger.error(f"Response was: {response_text}")
+        app.logger.error("Failed to parse Claude's response as JSON: %s", e)
+        app.logger.error("Response was: %s", response_text)
         return None
 
+SECTION_FIELDS = ('sectionId', 'sectionLabel', 'sectionRepeatCount')
+
+def frets_to_svguitar(frets):
+    """Convert an AI fret array to SVGuitar (open_strings, muted_strings, fingers)
+
+    AI arrays are [low E, A, D, G, B, high E] (index 0-5); SVGuitar numbers
+    strings 1=high E .. 6=low E, so index i is string 6 - i. -1 is muted, 0 is
+    open, and fretted notes get finger numbers 1, 2, 3... in array order.
+    """
+    open_strings = [6 - i for i, fret in enumerate(frets) if fret == 0]
+    muted_strings = [6 - i for i, fret in enumerate(frets) if fret == -1]
+    fretted = [(6 - i, fret) for i, fret in enumerate(frets) if fret > 0]
+    fingers = [[string_num, fret, str(n)] for n, (string_num, fret) in enumerate(fretted, start=1)]
+    return open_strings, muted_strings, fingers
+
 def create_chord_charts_from_data(chord_data, item_id):
     """Create chord charts in Google Sheets from parsed chord data using batch operations"""
     try:
@@ -2415,39 +2995,41 @@ def create_chord_charts_from_data(chord_data, item_id):
         
         # Extract tuning and capo from the analysis
         tuning = chord_data.get('tuning', 'EADGBE')
+        is_standard_tuning = tuning.upper() in ['EADGBE', 'STANDARD']
         capo = chord_data.get('capo', 0)
         
         # Pre-load all common chords efficiently to reduce API calls
         try:
-            app.logger.info(f"[AUTOCREATE] Starting CommonChords lookup - getting all common chords efficiently")
+            app.logger.info("[AUTOCREATE] Starting CommonChords lookup - getting all common chords efficiently")
             all_common_chords = get_common_chords_efficiently()
-            app.logger.info(f"[AUTOCREATE] Successfully loaded {len(all_common_chords)} common chords for autocreate")
+            app.logger.info("[AUTOCREATE] Successfully loaded %s common chords for autocreate", len(all_common_chords))
         except Exception as e:
-            app.logger.error(f"[AUTOCREATE] Failed to load common chords: {str(e)}")
-            app.logger.error(f"[AUTOCREATE] CommonChords error type: {type(e)}")
+            app.logger.error("[AUTOCREATE] Failed to load common chords: %s", e)
+            app.logger.error("[AUTOCREATE] CommonChords error type: %s", type(e))
             all_common_chords = []
         
-        # Log Claude's visual analysis for debugging
+        # Log Claude's visual analysis for debugging (skipped entirely unless DEBUG is on)
         try:
-            if 'analysis' in chord_data:
-                analysis = chord_data.get('analysis', {})
-                if 'referenceChordDescriptions' in analysis:
-                    app.logger.info("=== Claude's Visual Analysis of Reference Chord Diagrams ===")
-                    for ref_chord in analysis['referenceChordDescriptions']:
-                        app.logger.info(f"Chord: {ref_chord.get('name', 'Unknown')}")
-                        app.logger.info(f"Visual Description: {ref_chord.get('visualDescription', 'No description')}")
-                        app.logger.info(f"Extracted Pattern: {ref_chord.get('extractedPattern', 'No pattern')}")
-                        # Add position marker debugging info if present in description
-                        description = ref_chord.get('visualDescription', '')
-                        if 'fr' in description.lower():
-                            app.logger.info(f"🎯 Position marker detected in description: {description}")
-                    app.logger.info("=== End Visual Analysis ===")
+            if app.logger.isEnabledFor(logging.DEBUG):
+                if 'analysis' in chord_data:
+                    analysis = chord_data.get('analysis', {})
+                    if 'referenceChordDescriptions' in analysis:
+                        app.logger.debug("=== Claude's Visual Analysis of Reference Chord Diagrams ===")
+                        for ref_chord in analysis['referenceChordDescriptions']:
+                            app.logger.debug("Chord: %s", ref_chord.get('name', 'Unknown'))
+                            app.logger.debug("Visual Description: %s", ref_chord.get('visualDescription', 'No description'))
+                            app.logger.debug("Extracted Pattern: %s", ref_chord.get('extractedPattern', 'No pattern'))
+                            # Add position marker debugging info if present in description
+                            description = ref_chord.get('visualDescription', '')
+                            if 'fr' in description.lower():
+                                app.logger.debug("🎯 Position marker detected in description: %s", description)
+                        app.logger.debug("=== End Visual Analysis ===")
+                    else:
+                        app.logger.debug("No reference chord descriptions found in analysis")
                 else:
-                    app.logger.info("No reference chord descriptions found in analysis")
-            else:
-                app.logger.info("No analysis field found in Claude response (using older prompt format)")
+                    app.logger.debug("No analysis field found in Claude response (using older prompt format)")
         except Exception as e:
-            app.logger.warning(f"Error logging Claude visual analysis: {str(e)}")
+            app.logger.warning("Error logging Claude visual analysis: %s", e)
         
         # REFERENCE-FIRST APPROACH: When reference files are present, use them directly
         reference_chord_shapes = []  # Reference chord shapes in order of appearance
@@ -2476,9 +3058,9 @@ def create_chord_charts_from_data(chord_data, item_id):
                         # Also create name-based lookup for intelligent matching
                         reference_chord_by_name[clean_name.lower()] = reference_chord_data
                         
-                        app.logger.info(f"Reference chord #{len(reference_chord_shapes)}: {clean_name} → {extracted_pattern}")
+                        app.logger.debug("Reference chord #%s: %s → %s", len(reference_chord_shapes), clean_name, extracted_pattern)
                 
-                app.logger.info(f"✅ Loaded {len(reference_chord_shapes)} reference chords for direct use")
+                app.logger.info("✅ Loaded %s reference chords for direct use", len(reference_chord_shapes))
             else:
                 app.logger.info("No reference chord descriptions found - will use chord names approach")
         else:
@@ -2496,26 +3078,30 @@ def create_chord_charts_from_data(chord_data, item_id):
         if reference_chord_shapes:
             app.logger.info("=== INTELLIGENT REFERENCE-CHORD DATA INTEGRATION ===")
             
-            # Count chords in chord data sections  
-            total_chord_instances = sum(len(section.get('chords', [])) for section in chord_data.get('sections', []))
-            app.logger.info(f"Chord data has {total_chord_instances} chord instances across all sections")
-            app.logger.info(f"Reference file has {len(reference_chord_shapes)} unique chord shapes")
+            # Count chords in chord data sections and collect their names in one pass
+            sections = chord_data.get('sections', [])
+            total_chord_instances = 0
+            existing_chord_names = set()
+            for section in sections:
+                chords = section.get('chords', [])
+                total_chord_instances += len(chords)
+                existing_chord_names.update(chord.get('name', '').lower() for chord in chords)
+            app.logger.info("Chord data has %s chord instances across all sections", total_chord_instances)
+            app.logger.info("Reference file has %s unique chord shapes", len(reference_chord_shapes))
             
             if len(reference_chord_shapes) > total_chord_instances:
-                app.logger.info(f"📊 MISMATCH DETECTED: Reference file contains MORE chords than chord data")
-                app.logger.info(f"📊 SOLUTION: Will include ALL reference chords, organized by chord data structure")
+                app.logger.info("📊 MISMATCH DETECTED: Reference file contains MORE chords than chord data")
+                app.logger.info("📊 SOLUTION: Will include ALL reference chords, organized by chord data structure")
                 
                 # Add extra reference chords to the last section to ensure they're all included
-                sections = chord_data.get('sections', [])
                 if sections:
                     last_section = sections[-1]
-                    existing_chord_names = {chord.get('name', '').lower() for section in sections for chord in section.get('chords', [])}
                     
                     # Add any reference chords not found in chord data to the last section
                     for ref_chord in reference_chord_shapes:
                         ref_name = ref_chord['name'].lower()
                         if ref_name not in existing_chord_names:
-                            app.logger.info(f"🔍 Adding missing reference chord to last section: {ref_chord['name']}")
+                            app.logger.info("🔍 Adding missing reference chord to last section: %s", ref_chord['name'])
                             last_section.setdefault('chords', []).append({
                                 'name': ref_chord['name'],
                                 'frets': ref_chord['frets'],
@@ -2527,197 +3113,193 @@ def create_chord_charts_from_data(chord_data, item_id):
         if not sections:
             sections = [{'label': 'Chords', 'chords': []}]
         
+        shape_cache = {}  # shape key -> (chord name, chart data without section fields)
+        
+        # Index CommonChords once; the first entry wins, as the old linear scans did
+        common_by_name = {}
+        common_by_frets = {}
+        for common in all_common_chords:
+            common_by_name.setdefault(common.get('title', '').lower(), common)
+            if common.get('frets'):
+                common_by_frets.setdefault(tuple(common['frets']), common)
+        
         for section in sections:
             section_label = section.get('label', 'Chords')
             section_repeat = section.get('repeatCount', '')
             
             # Generate a unique section ID
-            import time
-            section_id = f"section-{int(time.time() * 1000)}"
+            section_id = f"section-{uuid4().hex[:12]}"
             
             for chord in section.get('chords', []):
                 chord_name = chord.get('name', 'Unknown')
                 chord_frets = chord.get('frets', [])
                 chord_fingers = chord.get('fingers', [])
                 source_type = chord.get('sourceType', 'chord_names')  # Default to chord_names if not specified
+                chord_name_lower = chord_name.lower()
                 
                 # REFERENCE-FIRST APPROACH: Check for reference chord by name
                 reference_match = None
-                if reference_chord_shapes and chord_name.lower() != 'unknown':
-                    reference_match = reference_chord_by_name.get(chord_name.lower())
+                if reference_chord_shapes and chord_name_lower != 'unknown':
+                    reference_match = reference_chord_by_name.get(chord_name_lower)
                     
                     if reference_match:
                         # Use reference chord shape and name directly
                         original_chord_data = f"{chord_name}: {chord_frets}" if chord_frets else f"{chord_name}: no frets"
                         chord_frets = reference_match['frets']
                         chord_name = reference_match['name']
+                        chord_name_lower = chord_name.lower()
                         source_type = 'reference_direct'
-                        app.logger.info(f"✅ REFERENCE-FIRST: {original_chord_data} → {chord_name} {chord_frets}")
+                        app.logger.info("✅ REFERENCE-FIRST: %s → %s %s", original_chord_data, chord_name, chord_frets)
                     else:
-                        app.logger.debug(f"No reference match found for chord name '{chord_name}'")
+                        app.logger.debug("No reference match found for chord name '%s'", chord_name)
                 
-                # Simplified processing: reference patterns or direct chord data
-                use_reference_pattern = (source_type in ['reference', 'reference_direct', 'reference_only'] and chord_frets)
-                use_direct_pattern = (source_type == 'chord_names' and chord_frets and tuning != 'EADGBE')
+                # Songs repeat the same few shapes; build each distinct one once and
+                # only stamp the section fields onto a copy for later instances
+                shape_key = (chord_name, tuple(chord_frets or ()), source_type,
+                             repr(chord_fingers), chord.get('startingFret', 1))
+                cached_shape = shape_cache.get(shape_key)
+                if cached_shape is not None:
+                    chord_name, shape = cached_shape
+                    chord_chart_data = {
+                        **shape,
+                        'sectionId': section_id,
+                        'sectionLabel': section_label,
+                        'sectionRepeatCount': section_repeat
+                    }
+                else:
+                    # Simplified processing: reference patterns or direct chord data
+                    use_reference_pattern = (source_type in ['reference', 'reference_direct', 'reference_only'] and chord_frets)
+                    use_direct_pattern = (source_type == 'chord_names' and chord_frets and tuning != 'EADGBE')
                 
-                if use_reference_pattern:
-                    app.logger.info(f"✅ Using reference diagram: {chord_name} = {chord_frets} in {tuning}")
-                elif use_direct_pattern:
-                    app.logger.info(f"✅ Using direct chord pattern: {chord_name} = {chord_frets} in {tuning}")
+                    if use_reference_pattern:
+                        app.logger.info("✅ Using reference diagram: %s = %s in %s", chord_name, chord_frets, tuning)
+                    elif use_direct_pattern:
+                        app.logger.info("✅ Using direct chord pattern: %s = %s in %s", chord_name, chord_frets, tuning)
                 
-                # Find the chord in pre-loaded common chords (case-insensitive)  
-                common_chord = None
-                chord_name_lower = chord_name.lower()
+                    # Find the chord in pre-loaded common chords (case-insensitive)  
+                    common_chord = None
                 
-                # Only lookup in CommonChords for standard tuning when not using direct patterns
-                is_standard_tuning = tuning.upper() in ['EADGBE', 'STANDARD']
-                if not (use_reference_pattern or use_direct_pattern):
-                    if not is_standard_tuning:
-                        app.logger.warning(f"⚠️  FALLBACK: Skipping CommonChords lookup for alternate tuning: {tuning}. CommonChords only contains EADGBE patterns.")
-                    elif chord_name_lower != 'unknown':
-                        for common in all_common_chords:
-                            if common.get('title', '').lower() == chord_name_lower:
-                                common_chord = common
-                                app.logger.info(f"📚 FALLBACK: Found {chord_name} in pre-loaded CommonChords by name")
-                                break
+                    # Only lookup in CommonChords for standard tuning when not using direct patterns
+                    if not (use_reference_pattern or use_direct_pattern):
+                        if not is_standard_tuning:
+                            app.logger.warning("⚠️  FALLBACK: Skipping CommonChords lookup for alternate tuning: %s. CommonChords only contains EADGBE patterns.", tuning)
+                        elif chord_name_lower != 'unknown':
+                            common_chord = common_by_name.get(chord_name_lower)
+                            if common_chord:
+                                app.logger.info("📚 FALLBACK: Found %s in pre-loaded CommonChords by name", chord_name)
                     
-                    # If not found by name and we have fret data, try to find by fret pattern (standard tuning only)
-                    if not common_chord and chord_frets and is_standard_tuning:
-                        # Try to match fret pattern in CommonChords (for transposed patterns)
-                        for common in all_common_chords:
-                            common_frets = common.get('frets', [])
-                            if common_frets == chord_frets:
-                                common_chord = common
-                                chord_name = common.get('title', chord_name)  # Use the chord name from CommonChords
-                                app.logger.info(f"📚 FALLBACK: Found chord by fret pattern match: {chord_name}")
-                                break
+                        # If not found by name and we have fret data, try to find by fret pattern (standard tuning only)
+                        if not common_chord and chord_frets and is_standard_tuning:
+                            # Try to match fret pattern in CommonChords (for transposed patterns)
+                            common_chord = common_by_frets.get(tuple(chord_frets))
+                            if common_chord:
+                                chord_name = common_chord.get('title', chord_name)  # Use the chord name from CommonChords
+                                app.logger.info("📚 FALLBACK: Found chord by fret pattern match: %s", chord_name)
                 
-                # Create chord chart data (unified processing for reference patterns or direct patterns)
-                if use_reference_pattern or use_direct_pattern:
-                    frets = chord_frets
+                    # Create chord chart data (unified processing for reference patterns or direct patterns)
+                    if use_reference_pattern or use_direct_pattern:
+                        frets = chord_frets
                     
-                    # Build SVGuitar-compatible data from chord pattern
-                    open_strings = []
-                    muted_strings = []
-                    svguitar_fingers = []
+                        # Build SVGuitar-compatible data from chord pattern
+                        open_strings, muted_strings, svguitar_fingers = frets_to_svguitar(frets or [])
                     
-                    if frets:
-                        finger_number = 1  # Auto-assign finger numbers
-                        for i, fret_val in enumerate(frets):
-                            # Convert AI array format to SVGuitar format
-                            # AI: [low E, A, D, G, B, high E] → SVGuitar: string 1=high E, string 6=low E
-                            string_num = 6 - i
-                            if fret_val == 0:
-                                open_strings.append(string_num)
-                            elif fret_val == -1:
-                                muted_strings.append(string_num)
-                            elif fret_val > 0:
-                                svguitar_fingers.append([string_num, fret_val, str(finger_number)])
-                                finger_number += 1
+                        # 🔧 SVGuitar Debug Logging (Reference Pattern Path)
+                        if app.logger.isEnabledFor(logging.DEBUG):
+                            app.logger.debug("🔧 SVGuitar Conversion Debug for %s (Reference Pattern):", chord_name)
+                            app.logger.debug("   Input frets: %s", frets)
+                            app.logger.debug("   SVGuitar fingers: %s", svguitar_fingers)
+                            app.logger.debug("   Open strings: %s", open_strings)
+                            app.logger.debug("   Muted strings: %s", muted_strings)
+                            app.logger.debug("   Tuning: %s", tuning)
                     
-                    # 🔧 SVGuitar Debug Logging (Reference Pattern Path)
-                    app.logger.info(f"🔧 SVGuitar Conversion Debug for {chord_name} (Reference Pattern):")
-                    app.logger.info(f"   Input frets: {frets}")
-                    app.logger.info(f"   SVGuitar fingers: {svguitar_fingers}")
-                    app.logger.info(f"   Open strings: {open_strings}")
-                    app.logger.info(f"   Muted strings: {muted_strings}")
-                    app.logger.info(f"   Tuning: {tuning}")
-                    
-                    chord_chart_data = {
-                        'title': chord_name,
-                        'tuning': tuning,
-                        'capo': capo,
-                        'numFrets': 5,
-                        'numStrings': len(frets) if frets else 6,
-                        'fingers': svguitar_fingers,
-                        'barres': [],
-                        'openStrings': open_strings,
-                        'mutedStrings': muted_strings,
-                        'sectionId': section_id,
-                        'sectionLabel': section_label,
-                        'sectionRepeatCount': section_repeat
-                    }
+                        chord_chart_data = {
+                            'title': chord_name,
+                            'tuning': tuning,
+                            'capo': capo,
+                            'numFrets': 5,
+                            'numStrings': len(frets) if frets else 6,
+                            'fingers': svguitar_fingers,
+                            'barres': [],
+                            'openStrings': open_strings,
+                            'mutedStrings': muted_strings,
+                            'sectionId': section_id,
+                            'sectionLabel': section_label,
+                            'sectionRepeatCount': section_repeat
+                        }
                     
-                    source_desc = "reference diagram" if use_reference_pattern else "chord pattern"
-                    app.logger.info(f"✅ Created chord chart from {source_desc}: {chord_name} = {frets} in {tuning}")
+                        source_desc = "reference diagram" if use_reference_pattern else "chord pattern"
+                        app.logger.info("✅ Created chord chart from %s: %s = %s in %s", source_desc, chord_name, frets, tuning)
                 
-                elif common_chord:
-                    # Use the chord from CommonChords (standard tuning path)
-                    chord_chart_data = {
-                        'title': chord_name,
-                        'tuning': common_chord.get('tuning', tuning),
-                        'capo': common_chord.get('capo', capo), 
-                        'startingFret': common_chord.get('startingFret', 1),
-                        'numFrets': common_chord.get('numFrets', 5),
-                        'numStrings': common_chord.get('numStrings', 6),
-                        'fingers': common_chord.get('fingers', []),
-                        'frets': common_chord.get('frets', []),
-                        'barres': common_chord.get('barres', []),
-                        'openStrings': common_chord.get('openStrings', []),
-                        'mutedStrings': common_chord.get('mutedStrings', []),
-                        'sectionId': section_id,
-                        'sectionLabel': section_label,
-                        'sectionRepeatCount': section_repeat
-                    }
-                else:
-                    # Fallback: use raw data from Claude/chord analysis (chord not found in CommonChords)
-                    # Prioritize fret data from chord analysis over generic fallback
-                    frets = chord_frets if chord_frets else chord.get('frets', [])
-                    fingers = chord_fingers if chord_fingers else chord.get('fingers', [])
-                    starting_fret = chord.get('startingFret', 1)
+                    elif common_chord:
+                        # Use the chord from CommonChords (standard tuning path)
+                        chord_chart_data = {
+                            'title': chord_name,
+                            'tuning': common_chord.get('tuning', tuning),
+                            'capo': common_chord.get('capo', capo), 
+                            'startingFret': common_chord.get('startingFret', 1),
+                            'numFrets': common_chord.get('numFrets', 5),
+                            'numStrings': common_chord.get('numStrings', 6),
+                            'fingers': common_chord.get('fingers', []),
+                            'frets': common_chord.get('frets', []),
+                            'barres': common_chord.get('barres', []),
+                            'openStrings': common_chord.get('openStrings', []),
+                            'mutedStrings': common_chord.get('mutedStrings', []),
+                            'sectionId': section_id,
+                            'sectionLabel': section_label,
+                            'sectionRepeatCount': section_repeat
+                        }
+                    else:
+                        # Fallback: use raw data from Claude/chord analysis (chord not found in CommonChords)
+                        # Prioritize fret data from chord analysis over generic fallback
+                        frets = chord_frets if chord_frets else chord.get('frets', [])
+                        fingers = chord_fingers if chord_fingers else chord.get('fingers', [])
+                        starting_fret = chord.get('startingFret', 1)
                     
-                    # Calculate starting fret from fret pattern if not specified
-                    if frets and starting_fret == 1:
-                        non_zero_frets = [f for f in frets if f > 0]
-                        if non_zero_frets:
-                            starting_fret = min(non_zero_frets)
+                        # Calculate starting fret from fret pattern if not specified
+                        if frets and starting_fret == 1:
+                            non_zero_frets = [f for f in frets if f > 0]
+                            if non_zero_frets:
+                                starting_fret = min(non_zero_frets)
                     
-                    # Convert frets to SVGuitar fingers format if fingers are empty but frets exist
-                    svguitar_fingers = fingers if fingers else []
-                    open_strings = []
-                    muted_strings = []
+                        # Convert frets to SVGuitar fingers format if fingers are empty but frets exist
+                        svguitar_fingers = fingers if fingers else []
+                        open_strings = []
+                        muted_strings = []
                     
-                    if frets and not svguitar_fingers:
-                        app.logger.info(f"Converting frets to SVGuitar format for {chord_name}: {frets}")
-                        finger_number = 1  # Auto-assign finger numbers
-                        for i, fret_val in enumerate(frets):
-                            # Fix string numbering: AI arrays are [low E, A, D, G, B, high E] (index 0-5)
-                            # SVGuitar expects: string 1=high E, string 6=low E
-                            string_num = 6 - i  # Convert: index 0 (low E) → SVGuitar string 6
-                                                 #          index 5 (high E) → SVGuitar string 1
-                            if fret_val == 0:
-                                open_strings.append(string_num)
-                            elif fret_val == -1:  # Sometimes muted strings are marked as -1
-                                muted_strings.append(string_num)
-                            elif fret_val > 0:  # Fretted note
-                                svguitar_fingers.append([string_num, fret_val, str(finger_number)])
-                                finger_number += 1
+                        if frets and not svguitar_fingers:
+                            app.logger.info("Converting frets to SVGuitar format for %s: %s", chord_name, frets)
+                            open_strings, muted_strings, svguitar_fingers = frets_to_svguitar(frets)
                     
-                    # 🔧 SVGuitar Debug Logging (Fallback Pattern Path)
-                    app.logger.info(f"🔧 SVGuitar Conversion Debug for {chord_name} (Fallback Pattern):")
-                    app.logger.info(f"   Input frets: {frets}")
-                    app.logger.info(f"   SVGuitar fingers: {svguitar_fingers}")
-                    app.logger.info(f"   Open strings: {open_strings}")
-                    app.logger.info(f"   Muted strings: {muted_strings}")
-                    app.logger.info(f"   Tuning: {tuning}")
+                        # 🔧 SVGuitar Debug Logging (Fallback Pattern Path)
+                        if app.logger.isEnabledFor(logging.DEBUG):
+                            app.logger.debug("🔧 SVGuitar Conversion Debug for %s (Fallback Pattern):", chord_name)
+                            app.logger.debug("   Input frets: %s", frets)
+                            app.logger.debug("   SVGuitar fingers: %s", svguitar_fingers)
+                            app.logger.debug("   Open strings: %s", open_strings)
+                            app.logger.debug("   Muted strings: %s", muted_strings)
+                            app.logger.debug("   Tuning: %s", tuning)
                     
-                    chord_chart_data = {
-                        'title': chord_name,
-                        'tuning': tuning,
-                        'capo': capo,
-                        'numFrets': 5,  # Default to 5 frets
-                        'numStrings': len(frets) if frets else 6,
-                        'fingers': svguitar_fingers,  # Use converted SVGuitar format
-                        'openStrings': open_strings,   # Derive from fret pattern
-                        'mutedStrings': muted_strings, # Derive from fret pattern
-                        'frets': frets,
-                        'barres': [],  # Could be enhanced to detect barres
-                        'sectionId': section_id,
-                        'sectionLabel': section_label,
-                        'sectionRepeatCount': section_repeat
-                    }
+                        chord_chart_data = {
+                            'title': chord_name,
+                            'tuning': tuning,
+                            'capo': capo,
+                            'numFrets': 5,  # Default to 5 frets
+                            'numStrings': len(frets) if frets else 6,
+                            'fingers': svguitar_fingers,  # Use converted SVGuitar format
+                            'openStrings': open_strings,   # Derive from fret pattern
+                            'mutedStrings': muted_strings, # Derive from fret pattern
+                            'frets': frets,
+                            'barres': [],  # Could be enhanced to detect barres
+                            'sectionId': section_id,
+                            'sectionLabel': section_label,
+                            'sectionRepeatCount': section_repeat
+                        }
                     
-                    app.logger.debug(f"Using chord fret data for {chord_name}: frets={frets}, fingers={fingers}")
+                        app.logger.debug("Using chord fret data for %s: frets=%s, fingers=%s", chord_name, frets, fingers)
+                    
+                    shape_cache[shape_key] = (chord_name, {
+                        k: v for k, v in chord_chart_data.items() if k not in SECTION_FIELDS
+                    })
                 
                 # Include the order in the chord data itself
                 chord_chart_data['order'] = chart_order
@@ -2728,15 +3310,15 @@ def create_chord_charts_from_data(chord_data, item_id):
         if all_chord_charts:
             chord_data_list = [chart_data for _, _, chart_data in all_chord_charts]
             
-            app.logger.info(f"[AUTOCREATE] Batch creating {len(chord_data_list)} chord charts for item {item_id}")
-            app.logger.info(f"[AUTOCREATE] Starting batch_add_chord_charts API call to Google Sheets")
+            app.logger.info("[AUTOCREATE] Batch creating %s chord charts for item %s", len(chord_data_list), item_id)
+            app.logger.info("[AUTOCREATE] Starting batch_add_chord_charts API call to Google Sheets")
             
             try:
                 batch_results = batch_add_chord_charts(item_id, chord_data_list)
-                app.logger.info(f"[AUTOCREATE] Batch creation completed, got {len(batch_results)} results")
+                app.logger.info("[AUTOCREATE] Batch creation completed, got %s results", len(batch_results))
             except Exception as batch_error:
-                app.logger.error(f"[AUTOCREATE] Batch creation failed: {str(batch_error)}")
-                app.logger.error(f"[AUTOCREATE] Batch error type: {type(batch_error)}")
+                app.logger.error("[AUTOCREATE] Batch creation failed: %s", batch_error)
+                app.logger.error("[AUTOCREATE] Batch error type: %s", type(batch_error))
                 raise
             
             # Build response with chord names and sections
@@ -2750,12 +3332,11 @@ def create_chord_charts_from_data(chord_data, item_id):
         return created_charts
         
     except Exception as e:
-        app.logger.error(f"Error creating chord charts: {str(e)}")
+        app.logger.error("Error creating chord charts: %s", e)
         raise
 
 def add_chord_chart_with_backoff(item_id, chord_chart_data, max_retries=3):
     """Add chord chart with exponential backoff for rate limiting"""
-    import time
     from app.sheets import add_chord_chart
     
     for attempt in range(max_retries):
@@ -2767,11 +3348,11 @@ def add_chord_chart_with_backoff(item_id, chord_chart_data, max_retries=3):
                 if attempt < max_retries - 1:
                     # Exponential backoff: 2, 4, 8 seconds
                     wait_time = 2 ** (attempt + 1)
-                    app.logger.warning(f"Rate limited, waiting {wait_time}s before retry {attempt + 1}/{max_retries}")
+                    app.logger.warning("Rate limited, waiting %ss before retry %s/%s", wait_time, attempt + 1, max_retries)
                     time.sleep(wait_time)
                     continue
                 else:
-                    app.logger.error(f"Max retries reached for rate limiting: {str(e)}")
+                    app.logger.error("Max retries reached for rate limiting: %s", e)
                     raise
             else:
                 # Non-rate limit error, don't retry
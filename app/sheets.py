@@ -6,7 +6,9 @@ import gspread
 import os
 import logging
 from datetime import datetime
-from functools import lru_cache
+from functools import lru_cache, wraps
+from contextlib import contextmanager
+from collections import OrderedDict
 import time
 import threading
 import json
@@ -14,6 +16,12 @@ import json
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
 
+def _to_id(value):
+    """Parse a sheet ID/order cell ('12' or '12.0') to int without going through float"""
+    text = str(value)
+    dot = text.find('.')
+    return int(text[:dot]) if dot >= 0 else int(text)
+
 # Global rate limiting for batch operations
 _last_batch_operation_time = 0
 _batch_operation_lock = threading.Lock()
@@ -153,6 +161,225 @@ def invalidate_caches():
     """Invalidate all caches when data is modified."""
     get_credentials.cache_clear()
     get_spread.cache_clear()
+    # The Routines index is appended to / rewritten by the functions that call this
+    invalidate_routine_records('Routines')
+
+# Short-lived shared Spread handle for read-heavy routes. Unlike get_spread() this
+# isn't dropped by invalidate_caches() on every write: the handle carries no sheet
+# values, only auth + spreadsheet ID, so writes never make it stale.
+SPREAD_CACHE_TTL = 60  # seconds
+_cached_spread = None
+_cached_spread_time = 0
+_cached_spread_lock = threading.Lock()
+# Worksheet handles on the shared Spread, by title. spread.worksheet(name) fetches
+# the spreadsheet metadata on every call; handles are dropped with the Spread.
+_cached_worksheets = {}
+
+def get_cached_spread():
+    """Get a Spread handle shared across requests for up to SPREAD_CACHE_TTL seconds."""
+    global _cached_spread, _cached_spread_time
+    with _cached_spread_lock:
+        now = time.time()
+        if _cached_spread is None or now - _cached_spread_time > SPREAD_CACHE_TTL:
+            _cached_spread = get_spread()
+            _cached_spread_time = now
+            _cached_worksheets.clear()
+        return _cached_spread
+
+def clear_cached_spread():
+    """Drop the shared Spread handle (e.g. when credentials change)."""
+    global _cached_spread
+    with _cached_spread_lock:
+        _cached_spread = None
+        _cached_worksheets.clear()
+
+def get_worksheet(worksheet_name):
+    """Get a worksheet by name (case-insensitive), reusing the handle until the Spread expires
+
+    Routine sheets are named by routine ID, so worksheet_name may be an int.
+    """
+    key = str(worksheet_name).lower()
+    spread = get_cached_spread()
+    with _cached_spread_lock:
+        worksheet = _cached_worksheets.get(key)
+    if worksheet is None:
+        try:
+            worksheet = next(ws for ws in spread.worksheets() if ws.title.lower() == key)
+        except StopIteration:
+            logging.error(f"Error getting worksheet {worksheet_name}: not found")
+            raise gspread.exceptions.WorksheetNotFound(str(worksheet_name))
+        with _cached_spread_lock:
+            if spread is _cached_spread:
+                _cached_worksheets[key] = worksheet
+    return worksheet
+
+def forget_worksheet(name):
+    """Drop a cached worksheet handle (e.g. after deleting that sheet)"""
+    with _cached_spread_lock:
+        _cached_worksheets.pop(str(name).lower(), None)
+
+class BatchWriter:
+    """Collects A1-range writes/clears and sends them as one values:batchUpdate
+    (plus one values:batchClear if anything was cleared)."""
+
+    def __init__(self, spread, value_input_option='RAW'):
+        self.spread = spread
+        self.value_input_option = value_input_option
+        self._updates = []
+        self._clears = []
+
+    def update(self, range_name, values):
+        """Queue a write; range_name must include the sheet, e.g. 'Items!D5'."""
+        self._updates.append({'range': range_name, 'values': values})
+
+    def clear(self, range_name):
+        """Queue a clear of range_name, e.g. '3!D2:D'."""
+        self._clears.append(range_name)
+
+    def flush(self):
+        for range_name in [u['range'] for u in self._updates] + self._clears:
+            invalidate_routine_records(range_name.split('!', 1)[0].strip("'"))
+        if self._updates:
+            self.spread.values_batch_update({
+                'valueInputOption': self.value_input_option,
+                'data': self._updates
+            })
+            self._updates = []
+        if self._clears:
+            self.spread.values_batch_clear(body={'ranges': self._clears})
+            self._clears = []
+
+@contextmanager
+def batch_writer(spread, value_input_option='RAW'):
+    """Queue writes inside the block and flush them together on exit.
+
+    Nothing is sent if the block raises.
+    """
+    writer = BatchWriter(spread, value_input_option)
+    yield writer
+    writer.flush()
+
+# Parsed routine worksheets (titled by routine ID), so back-to-back edits of one
+# routine don't re-fetch and re-parse it. records_to_sheet stores what it wrote;
+# any other write to a routine sheet drops that sheet's entry. Each sheet has a
+# version counter so a read that raced a write is never stored. Entries expire
+# after ROUTINE_RECORDS_TTL so edits made directly in Google Sheets show up.
+ROUTINE_RECORDS_CACHE_SIZE = 32
+ROUTINE_RECORDS_TTL = 10  # seconds
+_routine_records = OrderedDict()  # title -> (stored_at, records)
+_routine_records_versions = {}    # title -> writes seen so far
+_routine_records_lock = threading.Lock()
+
+def _as_cell_text(value):
+    """Render a written value the way sheet_to_records would read it back"""
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    return '' if value is None else str(value)
+
+def _store_routine_records(title, records):
+    _routine_records[title] = (time.time(), records)
+    _routine_records.move_to_end(title)
+    while len(_routine_records) > ROUTINE_RECORDS_CACHE_SIZE:
+        _routine_records.popitem(last=False)
+
+def invalidate_routine_records(title=None):
+    """Drop the cached records for one routine sheet, or for all of them"""
+    with _routine_records_lock:
+        titles = list(_routine_records_versions) if title is None else [str(title)]
+        for t in titles:
+            _routine_records_versions[t] = _routine_records_versions.get(t, 0) + 1
+            _routine_records.pop(t, None)
+
+def remember_routine_records(worksheet, records):
+    """Cache the records just written to a routine sheet (write-through)"""
+    title = worksheet.title
+    if not title.isdigit() or not records:
+        invalidate_routine_records(title)
+        return
+    cols = [chr(ord('A') + i) for i in range(ROUTINE_COLUMNS)]
+    written = [{col: _as_cell_text(r.get(col, '')) for col in cols} for r in records]
+    with _routine_records_lock:
+        _routine_records_versions[title] = _routine_records_versions.get(title, 0) + 1
+        _store_routine_records(title, written)
+
+def get_routine_records(worksheet):
+    """sheet_to_records() for a routine sheet (or the Routines index), served from
+    cache for up to ROUTINE_RECORDS_TTL seconds or until it's written.
+
+    Returns copies, so callers can edit the records and write them back.
+    """
+    title = worksheet.title
+    with _routine_records_lock:
+        cached = _routine_records.get(title)
+        if cached is not None and time.time() - cached[0] < ROUTINE_RECORDS_TTL:
+            _routine_records.move_to_end(title)
+            return [dict(r) for r in cached[1]]
+        version = _routine_records_versions.get(title, 0)
+    records = sheet_to_records(worksheet, is_routine_worksheet=True)
+    with _routine_records_lock:
+        if _routine_records_versions.get(title, 0) == version:
+            _store_routine_records(title, records)
+    return [dict(r) for r in records]
+
+# ChordCharts records, shared by the batch and per-item chart reads for
+# CHORD_CHART_CACHE_TTL seconds. Every chord chart write goes through a function
+# decorated with @invalidates_chord_charts, which drops the cache once it returns.
+CHORD_CHART_CACHE_TTL = 30  # seconds
+_chord_chart_cache = {'ts': 0, 'version': 0, 'records': None}
+_chord_chart_cache_lock = threading.Lock()
+
+def invalidate_chord_chart_records():
+    with _chord_chart_cache_lock:
+        _chord_chart_cache['version'] += 1
+        _chord_chart_cache['records'] = None
+
+def invalidates_chord_charts(func):
+    """Drop cached ChordCharts records after func runs (even if it raised part-way)"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            invalidate_chord_chart_records()
+    return wrapper
+
+def get_chord_chart_records():
+    """sheet_to_records() for ChordCharts, cached for CHORD_CHART_CACHE_TTL seconds.
+
+    Returns copies, so callers can edit the records.
+    """
+    with _chord_chart_cache_lock:
+        records = _chord_chart_cache['records']
+        if records is not None and time.time() - _chord_chart_cache['ts'] < CHORD_CHART_CACHE_TTL:
+            return [dict(r) for r in records]
+        version = _chord_chart_cache['version']
+    initialize_chordcharts_sheet()
+    sheet = get_worksheet('ChordCharts')
+    records = sheet_to_records(sheet, is_routine_worksheet=False)
+    with _chord_chart_cache_lock:
+        if _chord_chart_cache['version'] == version:  # No write landed while we were reading
+            _chord_chart_cache.update(ts=time.time(), records=records)
+    # Forget parsed ChordData for charts that no longer exist
+    live_ids = {r.get('A') for r in records}
+    for chord_id in [k for k in _parsed_chord_data if k not in live_ids]:
+        _parsed_chord_data.pop(chord_id, None)
+    return [dict(r) for r in records]
+
+# Parsed ChordData (column D) by chord ID, stored with the raw JSON it came from
+# so an edited chart is simply re-parsed
+_parsed_chord_data = {}  # chord_id -> (raw, parsed)
+
+def parse_chord_data(chord_id, raw):
+    """json.loads(raw) for a chart's ChordData, memoized per chord ID.
+
+    The returned dict is shared between calls; copy it before changing it.
+    """
+    cached = _parsed_chord_data.get(chord_id)
+    if cached is not None and cached[0] == raw:
+        return cached[1]
+    parsed = json.loads(raw)
+    _parsed_chord_data[chord_id] = (raw, parsed)
+    return parsed
 
 def sheet_to_records(worksheet, is_routine_worksheet=True, max_empty_rows=50):
     """Convert worksheet data to list of dictionaries.
@@ -288,6 +515,8 @@ def records_to_sheet(worksheet, records, is_routine_worksheet=True):
     worksheet.update(range_str, extended_rows, value_input_option='USER_ENTERED')
     logging.debug(f"Sheet update completed")
     logging.debug(f"Updated sheet with {len(rows)} records")
+    if is_routine_worksheet:
+        remember_routine_records(worksheet, records)
     
     return True
 
@@ -353,9 +582,9 @@ def create_routine(routine_name):
         # Find the next available ID that doesn't conflict with existing worksheet names
         used_ids = set()
         # Add IDs from existing routines
-        used_ids.update(int(float(r['A'])) for r in current_routines)
+        used_ids.update(_to_id(r['A']) for r in current_routines)
         # Add any numeric worksheet names that might exist
-        used_ids.update(int(float(name)) for name in existing_names if name.replace('.', '').isdigit())
+        used_ids.update(_to_id(name) for name in existing_names if name.replace('.', '').isdigit())
         
         if used_ids:
             new_id = max(used_ids) + 1
@@ -365,7 +594,7 @@ def create_routine(routine_name):
         logging.debug(f"Selected new ID: {new_id}")
         
         # Generate new order
-        new_order = max([int(float(r['D'])) for r in current_routines], default=-1) + 1  # Column D for order
+        new_order = max([_to_id(r['D']) for r in current_routines], default=-1) + 1  # Column D for order
         
         # Create new worksheet using ID as the sheet name
         worksheet = spread.add_worksheet(str(new_id), rows=1000, cols=20)
@@ -449,7 +678,7 @@ def add_item(item):
         logging.debug(f"Current records: {records}")
         
         # Generate new ID
-        new_id = max([int(float(r['A'])) for r in records], default=0) + 1
+        new_id = max([_to_id(r['A']) for r in records], default=0) + 1
         item['A'] = str(new_id)  # Column A for ID
         item['B'] = str(new_id)  # Column B for Item ID (same as A for items)
         logging.debug(f"Generated new ID: {new_id}")
@@ -463,7 +692,7 @@ def add_item(item):
         logging.debug(f"Final title after duplicate check: {item['C']}")
         
         # Set order to end of list
-        max_order = max([int(float(r['G'])) for r in records], default=-1)  # Column G for order
+        max_order = max([_to_id(r['G']) for r in records], default=-1)  # Column G for order
         item['G'] = str(max_order + 1)  # Column G for order
         logging.debug(f"Set order to: {item['G']}")
         
@@ -532,21 +761,21 @@ def delete_item(item_id):
         records = sheet_to_records(worksheet, is_routine_worksheet=False)
         
         # Find the item to delete
-        item_id = int(float(item_id))
-        deleted_item = next((item for item in records if int(float(item['A'])) == item_id), None)  # Column A for ID
+        item_id = _to_id(item_id)
+        deleted_item = next((item for item in records if _to_id(item['A']) == item_id), None)  # Column A for ID
         
         if not deleted_item:
             logging.error(f"Item {item_id} not found")
             return False
             
-        deleted_order = int(float(deleted_item['G']))  # Column G for order
+        deleted_order = _to_id(deleted_item['G'])  # Column G for order
         logging.debug(f"Found item {item_id} with order {deleted_order}")
         
         # Remove the item and update orders
-        records = [r for r in records if int(float(r['A'])) != item_id]  # Column A for ID
+        records = [r for r in records if _to_id(r['A']) != item_id]  # Column A for ID
         for record in records:
-            if int(float(record['G'])) > deleted_order:  # Column G for order
-                record['G'] = str(int(float(record['G'])) - 1)  # Column G for order
+            if _to_id(record['G']) > deleted_order:  # Column G for order
+                record['G'] = str(_to_id(record['G']) - 1)  # Column G for order
                 
         # Write back to sheet
         success = records_to_sheet(worksheet, records, is_routine_worksheet=False)
@@ -589,7 +818,7 @@ def get_routine(routine_id):
     try:
         # Get the worksheet directly using the ID as the sheet name
         worksheet = spread.worksheet(str(routine_id))
-        records = sheet_to_records(worksheet, is_routine_worksheet=True)
+        records = get_routine_records(worksheet)
         return records
     except Exception:
         raise ValueError(f"Routine with ID {routine_id} not found")
@@ -721,6 +950,31 @@ def test_sheets_connection():
             "error": str(e)
         }
 
+# /api/auth/status is polled by the frontend; reuse a recent connection test
+# instead of re-reading the Items sheet on every poll
+CONNECTION_STATUS_TTL = 30  # seconds
+_connection_status = None
+_connection_status_time = 0
+_connection_status_lock = threading.Lock()
+
+def get_cached_connection_status():
+    """Return test_sheets_connection() result, reused for up to CONNECTION_STATUS_TTL seconds."""
+    global _connection_status, _connection_status_time
+    with _connection_status_lock:
+        if _connection_status is not None and time.time() - _connection_status_time < CONNECTION_STATUS_TTL:
+            return _connection_status
+    result = test_sheets_connection()
+    with _connection_status_lock:
+        _connection_status = result
+        _connection_status_time = time.time()
+    return result
+
+def clear_connection_status():
+    """Forget the cached connection test (call when credentials change)."""
+    global _connection_status
+    with _connection_status_lock:
+        _connection_status = None
+
 def add_to_routine(routine_id, item_id, notes=""):
     """Add an item to a routine."""
     try:
@@ -732,12 +986,13 @@ def add_to_routine(routine_id, item_id, notes=""):
         order_col = worksheet.col_values(3)[1:]  # Skip header row
         
         # Generate new ID and order
-        new_id = max([int(float(id_)) for id_ in id_col if id_], default=0) + 1
-        max_order = max([int(float(order)) for order in order_col if order], default=-1)
+        new_id = max([_to_id(id_) for id_ in id_col if id_], default=0) + 1
+        max_order = max([_to_id(order) for order in order_col if order], default=-1)
         
         # Append just the new row directly
         new_row = [str(new_id), str(item_id), str(max_order + 1), 'FALSE']
         worksheet.append_row(new_row, value_input_option='USER_ENTERED')
+        invalidate_routine_records(worksheet.title)
         
         invalidate_caches()
         return {
@@ -761,7 +1016,7 @@ def update_routine_order(routine_id, items):
         worksheet = spread.worksheet(str(routine_id))  # Use ID as sheet name
         
         # Get existing items to ensure we have all data
-        existing_items = sheet_to_records(worksheet, is_routine_worksheet=True)
+        existing_items = get_routine_records(worksheet)
         logging.debug(f"Existing items: {existing_items}")
         
         # Create a map of routine entry IDs to their new order
@@ -796,18 +1051,18 @@ def delete_routine(routine_id):
         spread = get_spread()
         
         # Convert routine_id to integer for comparison
-        routine_id_int = int(float(routine_id))
+        routine_id_int = _to_id(routine_id)
         logging.debug(f"Attempting to delete routine with ID: {routine_id_int}")
         
         # First check if this is the active routine and deactivate if needed
         active_id = get_active_routine()
-        if active_id and int(float(active_id)) == routine_id_int:
+        if active_id and _to_id(active_id) == routine_id_int:
             logging.debug(f"Deactivating routine {routine_id_int} before deletion")
             set_routine_active(routine_id_int, active=False)
         
         # Get routine info from Routines sheet
         routines = get_all_routine_records()
-        routine = next((r for r in routines if int(float(r['A'])) == routine_id_int), None)  # Column A for ID
+        routine = next((r for r in routines if _to_id(r['A']) == routine_id_int), None)  # Column A for ID
         
         if not routine:
             logging.error(f"Routine with ID {routine_id_int} not found in routines list")
@@ -816,7 +1071,7 @@ def delete_routine(routine_id):
         logging.debug(f"Found routine to delete: {routine}")
         
         # Get the order value before deletion
-        deleted_order = int(float(routine['D']))  # Column D for order
+        deleted_order = _to_id(routine['D'])  # Column D for order
         logging.debug(f"Routine to delete has order: {deleted_order}")
             
         # Delete the worksheet using ID as sheet name
@@ -840,6 +1095,8 @@ def delete_routine(routine_id):
             
             # If we got the worksheet, try to delete it
             spread.del_worksheet(worksheet)
+            invalidate_routine_records(routine_id_str)
+            forget_worksheet(routine_id_str)
             logging.debug(f"Successfully deleted worksheet for routine {routine_id_str}")
         except gspread.exceptions.WorksheetNotFound:
             logging.warning(f"Worksheet {routine_id_str} not found, continuing with routine deletion")
@@ -859,9 +1116,9 @@ def delete_routine(routine_id):
             # Remove the routine and update orders for remaining routines
             updated_records = []
             for record in records:
-                current_id = int(float(record['A']))
+                current_id = _to_id(record['A'])
                 if current_id != routine_id_int:
-                    current_order = int(float(record['D']))
+                    current_order = _to_id(record['D'])
                     if current_order > deleted_order:
                         # Decrease order by 1 for all routines that were after the deleted one
                         record['D'] = str(current_order - 1)
@@ -894,7 +1151,7 @@ def update_routine_item(routine_id, item_id, item):
     try:
         spread = get_spread()
         worksheet = spread.worksheet(str(routine_id))  # Use ID as sheet name
-        records = sheet_to_records(worksheet, is_routine_worksheet=True)
+        records = get_routine_records(worksheet)
         
         # Find and update the item
         item_id = str(item_id)  # Ensure string comparison
@@ -929,7 +1186,7 @@ def remove_from_routine(routine_id, routine_entry_id):
         logging.debug(f"Starting remove_from_routine for routine: {routine_id}, routine_entry_id: {routine_entry_id}")
         spread = get_spread()
         worksheet = spread.worksheet(str(routine_id))  # Use ID as sheet name
-        records = sheet_to_records(worksheet, is_routine_worksheet=True)
+        records = get_routine_records(worksheet)
         logging.debug(f"Initial records: {records}")
         
         # Find and remove the item using routine entry ID (column A)
@@ -959,24 +1216,6 @@ def remove_from_routine(routine_id, routine_entry_id):
         logging.error(f"Error in remove_from_routine: {str(e)}")
         return False
 
-def get_worksheet(worksheet_name):
-    """Get a worksheet by name."""
-    try:
-        spread = get_spread()
-        
-        # Get all worksheet names
-        all_worksheets = spread.worksheets()
-        
-        # Find the worksheet with a case-insensitive match
-        for ws in all_worksheets:
-            if ws.title.lower() == worksheet_name.lower():
-                return ws
-                
-        raise gspread.exceptions.WorksheetNotFound(worksheet_name)
-    except Exception as e:
-        logging.error(f"Error getting worksheet {worksheet_name}: {str(e)}")
-        raise
-
 # ChordCharts functions
 def initialize_chordcharts_sheet():
     """Create and initialize the ChordCharts sheet if it doesn't exist."""
@@ -1005,13 +1244,7 @@ def initialize_chordcharts_sheet():
 def get_chord_charts_for_item(item_id):
     """Get all chord charts for a specific item."""
     try:
-        spread = get_spread()
-        
-        # Initialize sheet if it doesn't exist
-        initialize_chordcharts_sheet()
-        
-        sheet = spread.worksheet('ChordCharts')
-        records = sheet_to_records(sheet, is_routine_worksheet=False)
+        records = get_chord_chart_records()
         
         # Filter by ItemID (handle comma-separated values) and sort by Order
         item_id_str = str(item_id)
@@ -1023,7 +1256,7 @@ def get_chord_charts_for_item(item_id):
                 item_charts.append(r)
         
         # Sort by Order (column F)
-        item_charts.sort(key=lambda x: int(float(x.get('F', 0))))
+        item_charts.sort(key=lambda x: _to_id(x.get('F', 0)))
         
         # Parse ChordData JSON for each chart
         parsed_charts = []
@@ -1037,16 +1270,16 @@ def get_chord_charts_for_item(item_id):
                     logging.warning(f"Skipping chord chart {chart.get('A', 'unknown')} with empty/corrupted data")
                     continue
                 
-                chart_data = json.loads(chord_data_raw)
+                chart_data = parse_chord_data(chart.get('A'), chord_data_raw)
                 
                 # Validate essential chord data exists
                 if not chart_data or not isinstance(chart_data, dict):
                     logging.warning(f"Skipping chord chart {chart.get('A', 'unknown')} with invalid data structure")
                     continue
                 
-                # Ensure hasLineBreakAfter field exists for all chords
+                # Ensure hasLineBreakAfter field exists for all chords (copy; chart_data is shared)
                 if 'hasLineBreakAfter' not in chart_data:
-                    chart_data['hasLineBreakAfter'] = False
+                    chart_data = {**chart_data, 'hasLineBreakAfter': False}
                 
                 parsed_charts.append({
                     'id': chart.get('A'),  # Column A = ChordID
@@ -1066,6 +1299,7 @@ def get_chord_charts_for_item(item_id):
         logging.error(f"Error getting chord charts for item {item_id}: {str(e)}")
         return []
 
+@invalidates_chord_charts
 def add_chord_chart(item_id, chord_data):
     """Add a new chord chart for an item."""
     try:
@@ -1079,7 +1313,7 @@ def add_chord_chart(item_id, chord_data):
         records = sheet_to_records(sheet, is_routine_worksheet=False)
         
         # Generate new ChordID
-        new_id = max([int(float(r.get('A', 0))) for r in records if r.get('A')], default=0) + 1
+        new_id = max([_to_id(r.get('A', 0)) for r in records if r.get('A')], default=0) + 1
         
         # Get all ItemIDs that should be included for this item
         # Check if any existing chord charts for this item have multiple ItemIDs
@@ -1123,7 +1357,7 @@ def add_chord_chart(item_id, chord_data):
                 record_item_ids = [id.strip() for id in record_item_ids if id.strip()]
                 
                 if item_id_str in record_item_ids:
-                    current_order = int(float(record.get('F', 0)))
+                    current_order = _to_id(record.get('F', 0))
                     
                     # Check if this chord is in the same section by parsing its chord data
                     try:
@@ -1145,7 +1379,7 @@ def add_chord_chart(item_id, chord_data):
             logging.info(f"Made {shifts_made} order shifts for insertion")
         else:
             # Original behavior: add to end
-            max_order = max([int(float(r.get('F', -1))) for r in item_charts], default=-1)
+            max_order = max([_to_id(r.get('F', -1)) for r in item_charts], default=-1)
             new_order = max_order + 1
         
         # Format timestamp
@@ -1203,6 +1437,7 @@ def add_chord_chart(item_id, chord_data):
         logging.error(f"Error adding chord chart: {str(e)}")
         raise ValueError(f"Failed to add chord chart: {str(e)}")
 
+@invalidates_chord_charts
 def batch_add_chord_charts(item_id, chord_charts_data):
     """Add multiple chord charts for an item in a single operation to avoid rate limiting."""
     try:
@@ -1221,7 +1456,7 @@ def batch_add_chord_charts(item_id, chord_charts_data):
         records = sheet_to_records(sheet, is_routine_worksheet=False)
         
         # Generate new ChordIDs starting from max existing
-        max_id = max([int(float(r.get('A', 0))) for r in records if r.get('A')], default=0)
+        max_id = max([_to_id(r.get('A', 0)) for r in records if r.get('A')], default=0)
         
         # Get all ItemIDs that should be included for this item
         item_id_str = str(item_id)
@@ -1245,7 +1480,7 @@ def batch_add_chord_charts(item_id, chord_charts_data):
             order_val = r.get('F', -1)
             if order_val and str(order_val).strip():
                 try:
-                    valid_orders.append(int(float(str(order_val))))
+                    valid_orders.append(_to_id(order_val))
                 except (ValueError, TypeError):
                     continue
         max_order = max(valid_orders, default=-1)
@@ -1313,6 +1548,7 @@ def batch_add_chord_charts(item_id, chord_charts_data):
         logging.error(f"Error batch adding chord charts: {str(e)}")
         raise ValueError(f"Failed to batch add chord charts: {str(e)}")
 
+@invalidates_chord_charts
 def delete_chord_chart(chord_id):
     """Delete a chord chart by ID."""
     try:
@@ -1327,7 +1563,7 @@ def delete_chord_chart(chord_id):
             
         # Get the item_id and order of deleted chart
         item_id = chart_to_delete.get('B')
-        deleted_order = int(float(chart_to_delete.get('F', 0)))
+        deleted_order = _to_id(chart_to_delete.get('F', 0))
         
         # Remove the chart
         records = [r for r in records if r.get('A') != str(chord_id)]
@@ -1335,7 +1571,7 @@ def delete_chord_chart(chord_id):
         # Update order for remaining charts of the same item
         for record in records:
             if record.get('B') == item_id:  # Same item
-                current_order = int(float(record.get('F', 0)))
+                current_order = _to_id(record.get('F', 0))
                 if current_order > deleted_order:
                     record['F'] = str(current_order - 1)
         
@@ -1354,6 +1590,7 @@ def delete_chord_chart(chord_id):
         logging.error(f"Error deleting chord chart: {str(e)}")
         return False
 
+@invalidates_chord_charts
 def batch_delete_chord_charts(chord_ids):
     """Delete multiple chord charts by IDs in a single API transaction."""
     if not chord_ids:
@@ -1391,7 +1628,7 @@ def batch_delete_chord_charts(chord_ids):
                 
             charts_to_delete.append(chart_to_delete)
             item_id = chart_to_delete.get('B')
-            deleted_order = int(float(chart_to_delete.get('F', 0)))
+            deleted_order = _to_id(chart_to_delete.get('F', 0))
             
             if item_id not in items_affected:
                 items_affected[item_id] = []
@@ -1406,7 +1643,7 @@ def batch_delete_chord_charts(chord_ids):
             
             for record in records:
                 if record.get('B') == item_id:  # Same item
-                    current_order = int(float(record.get('F', 0)))
+                    current_order = _to_id(record.get('F', 0))
                     # Count how many deleted orders were below current order
                     adjustments = sum(1 for deleted_order in deleted_orders if deleted_order < current_order)
                     if adjustments > 0:
@@ -1449,6 +1686,7 @@ def batch_delete_chord_charts(chord_ids):
             'error': str(e)
         }
 
+@invalidates_chord_charts
 def update_chord_chart(chord_id, chord_data):
     """Update a chord chart by ID."""
     try:
@@ -1496,7 +1734,7 @@ def update_chord_chart(chord_id, chord_data):
                 'itemId': int(first_item_id),
                 'title': chart_to_update['C'],
                 'createdAt': chart_to_update['E'],
-                'order': int(float(chart_to_update['F'])),
+                'order': _to_id(chart_to_update['F']),
                 **existing_chord_data  # Spread the chord data to include hasLineBreakAfter
             }
             
@@ -1506,6 +1744,7 @@ def update_chord_chart(chord_id, chord_data):
         logging.error(f"Error updating chord chart: {str(e)}")
         raise ValueError(f"Failed to update chord chart: {str(e)}")
 
+@invalidates_chord_charts
 def update_chord_charts_order(item_id, chord_charts):
     """Update the order of chord charts for an item."""
     try:
@@ -1677,7 +1916,7 @@ def search_common_chord_charts(chord_name):
                         'itemId': row[1] if len(row) > 1 else 'common',
                         'title': row[2] if len(row) > 2 else chord_name,
                         'createdAt': row[4] if len(row) > 4 else '',
-                        'order': int(float(row[5])) if len(row) > 5 and row[5] else 0,
+                        'order': _to_id(row[5]) if len(row) > 5 and row[5] else 0,
                         'fingers': normalized_fingers,
                         'barres': chord_data.get('barres', []),
                         'numFrets': chord_data.get('numFrets', 5),
@@ -1709,6 +1948,29 @@ def search_common_chord_charts(chord_name):
         logging.error(f"Error searching common chord charts: {str(e)}")
         return []
 
+# CommonChords is effectively static reference data, so the normalized list is
+# kept in memory for COMMON_CHORDS_CACHE_TTL seconds. The functions that write
+# to the sheet are wrapped in @invalidates_common_chords.
+COMMON_CHORDS_CACHE_TTL = 300  # seconds
+_common_chords_cache = {'ts': 0, 'version': 0, 'chords': None}
+_common_chords_cache_lock = threading.Lock()
+
+def invalidate_common_chords_cache():
+    with _common_chords_cache_lock:
+        _common_chords_cache['version'] += 1
+        _common_chords_cache['chords'] = None
+
+def invalidates_common_chords(func):
+    """Drop the cached CommonChords list after func runs (even if it raised part-way)"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            invalidate_common_chords_cache()
+    return wrapper
+
+@invalidates_common_chords
 def seed_common_chord_charts():
     """Seed the CommonChords sheet with essential guitar chords."""
     try:
@@ -1894,6 +2156,7 @@ def convert_fret_positions_to_svguitar(positions_array, fingerings_array=None):
         logging.error(f"Error converting fret positions: {str(e)}")
         raise ValueError(f"Failed to convert chord format: {str(e)}")
 
+@invalidates_common_chords
 def bulk_import_chords_from_tormodkv(chord_names=None):
     """
     Import chords from TormodKv's SVGuitar-ChordCollection repository.
@@ -1929,7 +2192,7 @@ def bulk_import_chords_from_tormodkv(chord_names=None):
         existing_titles = {record.get('C', '').lower() for record in records}
         
         # Generate next available ID
-        next_id = max([int(float(r.get('A', 0))) for r in records if r.get('A')], default=0) + 1
+        next_id = max([_to_id(r.get('A', 0)) for r in records if r.get('A')], default=0) + 1
         next_order = len(records)
         
         # Filter chord names if specified
@@ -2016,6 +2279,7 @@ def bulk_import_chords_from_tormodkv(chord_names=None):
         logging.error(f"Error in bulk import: {str(e)}")
         raise ValueError(f"Bulk import failed: {str(e)}")
 
+@invalidates_common_chords
 def bulk_import_chords_from_local_file(chord_names=None, local_file_path=None):
     """
     Import chords from local TormodKv chord collection file.
@@ -2058,7 +2322,7 @@ def bulk_import_chords_from_local_file(chord_names=None, local_file_path=None):
         existing_titles = {record.get('C', '').lower() for record in records}
         
         # Generate next available ID
-        next_id = max([int(float(r.get('A', 0))) for r in records if r.get('A')], default=0) + 1
+        next_id = max([_to_id(r.get('A', 0)) for r in records if r.get('A')], default=0) + 1
         next_order = len(records)
         
         # Filter chord names if specified
@@ -2163,6 +2427,7 @@ def get_chart_section_data(chart_record):
             'sectionRepeatCount': ''
         }
 
+@invalidates_chord_charts
 def copy_chord_charts_to_items(source_item_id, target_item_ids):
     """Copy chord charts from one song to multiple other songs using sharing model with conflict resolution.
     
@@ -2260,7 +2525,23 @@ def copy_chord_charts_to_items(source_item_id, target_item_ids):
         raise ValueError(f"Failed to copy chord charts: {str(e)}")
 
 def get_common_chords_efficiently():
-    """Get all common chord charts efficiently using fixed range (12,710 total rows)."""
+    """Get all common chord charts efficiently using fixed range (12,710 total rows).
+
+    Served from memory for COMMON_CHORDS_CACHE_TTL seconds after a successful load.
+    """
+    with _common_chords_cache_lock:
+        chords = _common_chords_cache['chords']
+        if chords is not None and time.time() - _common_chords_cache['ts'] < COMMON_CHORDS_CACHE_TTL:
+            return list(chords)
+        version = _common_chords_cache['version']
+    chords = _load_common_chords()
+    if chords:
+        with _common_chords_cache_lock:
+            if _common_chords_cache['version'] == version:  # No import landed while we were reading
+                _common_chords_cache.update(ts=time.time(), chords=chords)
+    return list(chords)
+
+def _load_common_chords():
     try:
         spread = get_spread()
         
@@ -0,0 +1,268 @@
+import os
+import gzip
+import hashlib
+import mimetypes
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Tuple
+from flask import request, send_file, jsonify, abort
+from werkzeug.utils import safe_join
+from app import app
+from app.sheets import get_credentials
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip sidecars still work without it
+    brotli = None
+
+# Static assets are served with long-lived, immutable caching. Vite writes to
+# fixed filenames (js/main.js, css/main.css), so url_for('static', ...) appends
+# the file's mtime as a ?v= cache-buster; a rebuild changes the URL and the
+# browser fetches the new file instead of revalidating on every page load.
+STATIC_MAX_AGE = 31536000  # one year
+
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = STATIC_MAX_AGE
+
+# With STATIC_VIA_PROXY=1 Flask has no static folder (nginx serves /static/*),
+# but the files still live here; the manifest and ?v= cache-buster use them
+STATIC_FOLDER = app.static_folder or os.path.join(app.root_path, 'static')
+
+# Text assets get .br/.gz sidecars written next to them by `flask precompress-static`
+# (run after `npm run build`), or at startup when PRECOMPRESS_STATIC=1. Importing
+# the app on its own never writes into the static folder.
+PRECOMPRESS_STATIC = os.environ.get('PRECOMPRESS_STATIC') == '1'
+COMPRESSIBLE_EXTENSIONS = ('.js', '.css', '.svg', '.html', '.json', '.map')
+SIDECAR_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Metadata for every static file is loaded once at startup so the request path
+# is a dict lookup. In debug mode each hit re-stats its file so Vite rebuilds
+# show up without a restart; otherwise POST /admin/reload refreshes the index.
+STATIC_INDEX = {}
+
+
+@dataclass(slots=True, frozen=True)
+class Manifest:
+    """One STATIC_INDEX entry; sidecars are (encoding, path, etag) tuples"""
+    path: str
+    mtime_ns: int
+    size: int
+    etag: str
+    sidecars: Tuple[Tuple[str, str, str], ...] = ()
+
+
+# nginx doesn't understand X-Sendfile; with USE_X_SENDFILE=1 and this prefix set,
+# the header is rewritten to X-Accel-Redirect pointing at an internal location:
+#   location /_static/ { internal; alias /path/to/app/static/; }
+STATIC_ACCEL_REDIRECT_PREFIX = os.getenv('STATIC_ACCEL_REDIRECT_PREFIX')
+
+
+def _compute_etag(filename, st):
+    return hashlib.blake2b(
+        f"{st.st_mtime_ns}-{st.st_size}-{filename}".encode(), digest_size=16
+    ).hexdigest()
+
+
+def _build_entry(rel, path):
+    """Return the manifest entry for one static file, or None if it is missing
+
+    sidecars is a tuple of (encoding, sidecar path, sidecar etag) for every
+    precompressed variant that is at least as new as the source file.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    sidecars = []
+    if rel.endswith(COMPRESSIBLE_EXTENSIONS):
+        for encoding, suffix in SIDECAR_ENCODINGS:
+            try:
+                sst = os.stat(path + suffix)
+            except OSError:
+                continue
+            if sst.st_mtime_ns >= st.st_mtime_ns:
+                sidecars.append((encoding, path + suffix, _compute_etag(rel + suffix, sst)))
+    return Manifest(
+        path=path,
+        mtime_ns=st.st_mtime_ns,
+        size=st.st_size,
+        etag=_compute_etag(rel, st),
+        sidecars=tuple(sidecars),
+    )
+
+
+def build_static_index():
+    """Walk the static folder and rebuild STATIC_INDEX"""
+    index = {}
+    sidecar_suffixes = tuple(suffix for _, suffix in SIDECAR_ENCODINGS)
+    for root, _dirs, files in os.walk(STATIC_FOLDER):
+        for name in files:
+            if name.endswith(sidecar_suffixes):
+                continue
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, STATIC_FOLDER).replace(os.sep, '/')
+            entry = _build_entry(rel, path)
+            if entry is not None:
+                index[rel] = entry
+    STATIC_INDEX.clear()
+    STATIC_INDEX.update(index)
+
+
+def _get_asset_meta(filename):
+    entry = STATIC_INDEX.get(filename)
+    if not app.debug:
+        return entry
+    # Dev: pick up rebuilt, new and deleted files
+    path = entry.path if entry else safe_join(STATIC_FOLDER, filename)
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        STATIC_INDEX.pop(filename, None)
+        return None
+    if entry is None or st.st_mtime_ns != entry.mtime_ns or st.st_size != entry.size:
+        entry = _build_entry(filename, path)
+        STATIC_INDEX[filename] = entry
+    return entry
+
+
+def _write_sidecar(path, suffix, data):
+    sidecar = path + suffix
+    if suffix == '.br':
+        compressed = brotli.compress(data, quality=11)
+    else:
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    with open(sidecar, 'wb') as f:
+        f.write(compressed)
+
+
+def precompress_static_assets():
+    """Generate missing or stale .br/.gz files for compressible static assets"""
+    written = 0
+    for root, _dirs, files in os.walk(STATIC_FOLDER):
+        for name in files:
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            try:
+                src_mtime = os.stat(path).st_mtime
+                data = None
+                for encoding, suffix in SIDECAR_ENCODINGS:
+                    if suffix == '.br' and brotli is None:
+                        continue
+                    sidecar = path + suffix
+                    if os.path.exists(sidecar) and os.stat(sidecar).st_mtime >= src_mtime:
+                        continue
+                    if data is None:
+                        with open(path, 'rb') as f:
+                            data = f.read()
+                    _write_sidecar(path, suffix, data)
+                    written += 1
+            except OSError as e:
+                app.logger.warning("Could not precompress %s: %s", path, e)
+    if written:
+        app.logger.info("Precompressed %s static asset sidecar(s)", written)
+
+
+def _pick_encoding(entry):
+    """Return (encoding, sidecar path, etag) for the best accepted sidecar, or None"""
+    accepted = request.accept_encodings
+    for encoding, sidecar_path, etag in entry.sidecars:
+        if accepted[encoding]:
+            return encoding, sidecar_path, etag
+    return None
+
+
+def custom_static(filename):
+    """Serve static files with a strong ETag and 304 on revalidation"""
+    entry = _get_asset_meta(filename)
+    if entry is None:
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    picked = _pick_encoding(entry)
+    if picked is None:
+        served_path, etag = entry.path, entry.etag
+        response = send_file(served_path, mimetype=mimetype, conditional=True, etag=False)
+    else:
+        encoding, served_path, etag = picked
+        response = send_file(served_path, mimetype=mimetype, conditional=True, etag=False)
+        response.headers['Content-Encoding'] = encoding
+    if filename.endswith(COMPRESSIBLE_EXTENSIONS):
+        response.vary.add('Accept-Encoding')
+    # Each encoding is a different representation, so it has its own ETag.
+    # Last-Modified always reflects the source file so If-Modified-Since
+    # works the same regardless of which sidecar was sent.
+    response.set_etag(etag)
+    response.last_modified = datetime.fromtimestamp(entry.mtime_ns / 1e9, tz=timezone.utc)
+    if response.date is None:
+        response.date = datetime.now(timezone.utc)
+    if app.use_x_sendfile and STATIC_ACCEL_REDIRECT_PREFIX:
+        served = os.path.relpath(served_path, STATIC_FOLDER).replace(os.sep, '/')
+        response.headers.pop('X-Sendfile', None)
+        response.headers['X-Accel-Redirect'] = f"{STATIC_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{served}"
+    return response.make_conditional(request)
+
+
+# Swap the view behind Flask's built-in 'static' rule so url_for keeps working
+if app.static_folder is not None:
+    app.view_functions['static'] = custom_static
+
+if PRECOMPRESS_STATIC:
+    precompress_static_assets()
+build_static_index()
+
+
+@app.cli.command('precompress-static')
+def precompress_static_command():
+    """Write missing or stale .br/.gz sidecars for the built static assets"""
+    precompress_static_assets()
+
+
+@app.route('/admin/reload', methods=['POST'])
+def reload_static_assets():
+    """Rebuild the static manifest after a deploy or rebuild (requires valid credentials)"""
+    creds, _ = get_credentials()
+    if not creds or not creds.valid:
+        return jsonify({"error": "Not authenticated"}), 401
+    precompress_static_assets()
+    build_static_index()
+    return jsonify({'success': True, 'assets': len(STATIC_INDEX)})
+
+
+@app.url_defaults
+def add_static_version(endpoint, values):
+    """Append ?v=<mtime> to static URLs so changed files get a new URL"""
+    if endpoint != 'static' or 'v' in values:
+        return
+    filename = values.get('filename')
+    if not filename:
+        return
+    entry = _get_asset_meta(filename)
+    if entry is not None:
+        values['v'] = entry.mtime_ns // 1_000_000_000
+
+
+@app.after_request
+def set_static_cache_headers(response):
+    if request.endpoint != 'static':
+        return response
+    if response.status_code in (200, 304) and request.args.get('v'):
+        response.headers['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE}, immutable'
+    else:
+        # Unversioned URLs (e.g. modules imported by main.js) must revalidate
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+# Optional (pip install whitenoise, or the [whitenoise] extra): let WhiteNoise
+# serve /static/* at the WSGI layer, ahead of Flask's routing. It serves the .br/.gz sidecars itself. It can't see the ?v= query,
+# and Vite chunk names aren't content-hashed, so keep max_age short here.
+if os.environ.get('USE_WHITENOISE') == '1':
+    from whitenoise import WhiteNoise
+    app.wsgi_app = WhiteNoise(
+        app.wsgi_app,
+        root=STATIC_FOLDER,
+        prefix='static/',
+        max_age=int(os.environ.get('WHITENOISE_MAX_AGE', 60)),
+        autorefresh=app.debug,
+    )
@@ -1,10 +1,12 @@
 from dotenv import load_dotenv
 import os
-from app import app
 import secrets
 
+# Load .env before importing the app: modules read their settings at import time
 load_dotenv()
 
+from app import app
+
 os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'  
 
 app.secret_key = secrets.token_hex(16)
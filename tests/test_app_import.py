@@ -0,0 +1,11 @@
+import importlib
+
+
+def test_app_imports():
+    """Importing the package wires up routes and sheets without NameErrors"""
+    app_module = importlib.import_module('app')
+    sheets = importlib.import_module('app.sheets')
+
+    assert app_module.app.url_map is not None
+    assert callable(sheets.invalidates_common_chords)
+    assert callable(sheets.seed_common_chord_charts)
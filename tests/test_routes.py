@@ -0,0 +1,225 @@
+from app import app, routes
+
+
+class FakeItemsSheet:
+    def __init__(self):
+        self.appended = []
+
+    def append_rows(self, rows, **kwargs):
+        self.appended.extend(rows)
+        return {'updates': {'updatedRange': 'Items!A5:H6'}}
+
+
+class FakeSpread:
+    def __init__(self, column_a):
+        self.column_a = column_a
+
+    def values_get(self, range_name):
+        assert range_name == 'Items!A2:A'
+        return {'values': self.column_a}
+
+
+def test_bulk_import_items_writes_complete_rows(monkeypatch):
+    sheet = FakeItemsSheet()
+    monkeypatch.setattr(routes, 'get_cached_spread', lambda: FakeSpread([['1'], ['7.0'], [], ['x'], ['3']]))
+    monkeypatch.setattr(routes, 'get_worksheet', lambda name: sheet)
+
+    response = app.test_client().post('/api/items/bulk', json=[
+        {'title': 'Scales', 'duration': '5'},
+        {'title': 'Arpeggios', 'duration': '10'},
+    ])
+
+    assert response.status_code == 200
+    assert response.get_json() == {'success': True, 'imported': 2}
+    assert [row[:3] for row in sheet.appended] == [['8', '8', 'Scales'], ['9', '9', 'Arpeggios']]
+    assert [row[6] for row in sheet.appended] == ['8', '9']
+
+
+class StaleFileError(Exception):
+    status_code = 404
+
+
+class FakeFiles:
+    def __init__(self):
+        self.uploads = 0
+
+    async def upload(self, file):
+        self.uploads += 1
+        return type('Uploaded', (), {'id': f'file_new{self.uploads}'})()
+
+
+class FakeMessages:
+    def __init__(self):
+        self.sent_file_ids = []
+
+    async def create(self, **kwargs):
+        file_id = kwargs['messages'][0]['content'][0]['source']['file_id']
+        self.sent_file_ids.append(file_id)
+        if file_id == 'file_stale':
+            raise StaleFileError(f'File not found: {file_id}')
+        return 'ok'
+
+
+class FakeClient:
+    def __init__(self):
+        self.beta = type('Beta', (), {})()
+        self.beta.files = FakeFiles()
+        self.beta.messages = FakeMessages()
+
+
+def test_stale_cached_file_id_is_reuploaded_and_retried(monkeypatch):
+    store = {}
+    monkeypatch.setattr(routes, 'ANTHROPIC_FILES_API', True)
+    monkeypatch.setattr(routes.llm_cache, 'get', store.get)
+    monkeypatch.setattr(routes.llm_cache, 'set', lambda key, value, ttl_days=None: store.__setitem__(key, value))
+    monkeypatch.setattr(routes.llm_cache, 'delete', lambda key: store.pop(key, None))
+
+    upload = routes.UploadedFile(name='song.pdf', type='pdf', raw=b'%PDF', sha256='abc',
+                                 media_type='application/pdf')
+    store['anthropic-file:abc'] = 'file_stale'
+    client = FakeClient()
+
+    async def run():
+        await routes.upload_to_files_api(client, [upload])
+        return await routes.claude_messages_create(client, model='m', max_tokens=10, messages=[
+            {'role': 'user', 'content': [routes._make_source_block(upload)]}
+        ])
+
+    assert routes.asyncio.run(run()) == 'ok'
+    assert client.beta.messages.sent_file_ids == ['file_stale', 'file_new1']
+    assert store['anthropic-file:abc'] == 'file_new1'
+
+
+def test_error_responses_are_not_cached(monkeypatch):
+    calls = []
+
+    def failing_spread():
+        calls.append(True)
+        raise RuntimeError('quota exceeded')
+
+    monkeypatch.setattr(routes, 'get_cached_spread', failing_spread)
+    routes.cache.clear()
+    client = app.test_client()
+
+    assert client.get('/api/items/lightweight').status_code == 500
+    assert client.get('/api/items/lightweight').status_code == 500
+    assert len(calls) == 2
+
+
+class FakeWriter:
+    def __init__(self):
+        self.updates = []
+        self.clears = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def update(self, cell, values):
+        self.updates.append((cell, values))
+
+    def clear(self, cell):
+        self.clears.append(cell)
+
+
+def test_toggle_writer_is_not_started_on_import():
+    import threading
+
+    assert routes._toggle_writer is None
+    assert 'toggle-writer' not in [t.name for t in threading.enumerate()]
+
+
+def test_toggles_resolve_rows_when_written(monkeypatch):
+    writer = FakeWriter()
+    row_maps = {'3': {'10': 2, '11': 5}}
+    monkeypatch.setattr(routes, 'get_cached_spread', lambda: object())
+    monkeypatch.setattr(routes, 'batch_writer', lambda spread: writer)
+    monkeypatch.setattr(routes, 'get_routine_row_map',
+                        lambda spread, routine_id, refresh=False: row_maps[routine_id])
+
+    # Entry 11 moved from row 5 to row 7 after the toggle was queued
+    row_maps['3'] = {'10': 2, '11': 7}
+    routes._write_toggles({('3', '11'): True, ('3', '10'): False, ('3', '99'): True})
+
+    assert writer.updates == [('3!D7', [['TRUE']])]
+    assert writer.clears == ['3!D2']
+
+
+def test_large_json_bodies_are_not_capped_by_the_upload_limit(monkeypatch):
+    sheet = FakeItemsSheet()
+    monkeypatch.setattr(routes, 'get_cached_spread', lambda: FakeSpread([]))
+    monkeypatch.setattr(routes, 'get_worksheet', lambda name: sheet)
+    items = [{'title': 'x' * 1000, 'duration': '5'}] * 12000  # ~12MB of JSON
+
+    response = app.test_client().post('/api/items/bulk', json=items)
+
+    assert response.status_code == 200
+    assert app.config['MAX_CONTENT_LENGTH'] is None
+
+
+def test_autocreate_rejects_oversized_uploads():
+    response = app.test_client().post('/api/autocreate-chord-charts', data=b'x' * (routes.MAX_UPLOAD_REQUEST_BYTES + 1),
+                                      content_type='application/octet-stream')
+
+    assert response.status_code == 413
+
+
+class FakeStream:
+    def __init__(self, chunks, stop_sequence):
+        self.chunks = chunks
+        self.final = type('Final', (), {'stop_reason': 'stop_sequence', 'stop_sequence': stop_sequence})()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def get_final_message(self):
+        return self.final
+
+
+def test_stop_sequence_is_restored_and_reply_parses(monkeypatch):
+    monkeypatch.setattr(routes, 'ANTHROPIC_FILES_API', True)
+    reply = ['Here you go:\n```\n', 'ignored\n```\n\n```json\n{"sections": [{"chords": []}]', '\n']
+
+    class StreamingMessages:
+        def stream(self, **kwargs):
+            assert kwargs['stop_sequences'] == routes.JSON_FENCE_STOP_SEQUENCES
+            return FakeStream(reply, '}\n```')
+
+    client = FakeClient()
+    client.beta.messages = StreamingMessages()
+
+    text = routes.asyncio.run(routes.claude_stream_text(
+        client, model='m', max_tokens=10, stop_sequences=routes.JSON_FENCE_STOP_SEQUENCES,
+        messages=[{'role': 'user', 'content': 'hi'}]))
+
+    assert text.endswith('}\n```')
+    assert routes.parse_json_response(text) == {'sections': [{'chords': []}]}
+
+
+def test_run_claude_times_out_and_cancels(monkeypatch):
+    import pytest
+
+    monkeypatch.setattr(routes, 'CLAUDE_RUN_TIMEOUT', 0.05)
+    cancelled = []
+
+    async def stuck():
+        try:
+            await routes.asyncio.sleep(60)
+        except routes.asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    with pytest.raises(TimeoutError):
+        routes.run_claude(stuck())
+    routes.time.sleep(0.05)
+    assert cancelled
@@ -0,0 +1,48 @@
+import gspread
+import pytest
+
+from app import sheets
+
+
+class FakeWorksheet:
+    def __init__(self, title):
+        self.title = title
+
+
+class FakeSpread:
+    def __init__(self, titles):
+        self._worksheets = [FakeWorksheet(title) for title in titles]
+        self.worksheets_calls = 0
+
+    def worksheets(self):
+        self.worksheets_calls += 1
+        return self._worksheets
+
+
+@pytest.fixture
+def fake_spread(monkeypatch):
+    spread = FakeSpread(['Items', 'Routines', '3'])
+    monkeypatch.setattr(sheets, 'get_spread', lambda: spread)
+    sheets.clear_cached_spread()
+    yield spread
+    sheets.clear_cached_spread()
+
+
+def test_get_worksheet_accepts_int_routine_id(fake_spread):
+    assert sheets.get_worksheet(3).title == '3'
+
+
+def test_get_worksheet_is_case_insensitive_and_cached(fake_spread):
+    assert sheets.get_worksheet('items').title == 'Items'
+    assert sheets.get_worksheet('Items').title == 'Items'
+    assert fake_spread.worksheets_calls == 1
+
+
+def test_get_worksheet_missing_raises(fake_spread):
+    with pytest.raises(gspread.exceptions.WorksheetNotFound):
+        sheets.get_worksheet(99)
+
+
+@pytest.mark.parametrize('value, expected', [('12', 12), ('12.0', 12), (7, 7), (3.0, 3), ('-1', -1)])
+def test_to_id_parses_sheet_cells(value, expected):
+    assert sheets._to_id(value) == expected
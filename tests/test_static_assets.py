@@ -0,0 +1,12 @@
+from app import app, static_assets
+
+
+def test_admin_reload_requires_credentials(monkeypatch):
+    monkeypatch.setattr(static_assets, 'get_credentials', lambda: (None, None))
+    called = []
+    monkeypatch.setattr(static_assets, 'precompress_static_assets', lambda: called.append(True))
+
+    response = app.test_client().post('/admin/reload')
+
+    assert response.status_code == 401
+    assert not called